@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Benchmark chunking throughput for each CHUNK_STRATEGY over large texts.
+
+Usage:
+    python -m benchmarks.chunk_throughput [--file FILE] [--words 1000000] [--strategies sentence,window,paragraph]
+
+Without --file, synthetic text with --words words is generated. Each
+strategy is also run on a quarter and a half of the text; a constant
+microseconds-per-MB figure across sizes shows chunking is linear.
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_text
+from core.chunker import iter_chunks, get_token_counter
+from core.extractor import TEXT_BLOCK_CHARS
+
+
+def split_pages(text, page_chars=TEXT_BLOCK_CHARS):
+    """
+    Split text into pages of about page_chars characters on line or word
+    boundaries, as iter_pages does for plain-text files.
+    """
+    pages = []
+    start = 0
+    while start < len(text):
+        end = min(start + page_chars, len(text))
+        if end < len(text):
+            cut = max(text.rfind("\n", start, end), text.rfind(" ", start, end))
+            end = cut + 1 if cut > start else end
+        pages.append((len(pages) + 1, text[start:end]))
+        start = end
+    return pages
+
+
+def run(text, strategies, max_tokens, overlap, repeat):
+    results = []
+    for strategy in strategies:
+        for fraction in (0.25, 0.5, 1.0):
+            sample = text[:int(len(text) * fraction)]
+            pages = split_pages(sample)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                chunks = list(iter_chunks(pages, max_tokens=max_tokens, overlap=overlap, strategy=strategy))
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            megabytes = len(sample.encode("utf-8")) / 1e6
+            words = len(sample.split())
+            results.append({
+                "strategy": strategy,
+                "words": words,
+                "chunks": len(chunks),
+                "avg_tokens": round(sum(c["tokens"] for c in chunks) / max(len(chunks), 1), 1),
+                "seconds": round(best, 3),
+                "words_per_second": round(words / best),
+                "us_per_mb": round(best * 1e6 / megabytes),
+            })
+            print(f"{strategy:9s} words={words:9d}  {best:7.3f}s  {words / best:10.0f} words/s  "
+                  f"{len(chunks):6d} chunks", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="Text file to chunk (default: generate synthetic text)")
+    parser.add_argument("--words", type=int, default=1000000, help="Words of synthetic text")
+    parser.add_argument("--strategies", default="sentence,window,paragraph")
+    parser.add_argument("--max-tokens", type=int, default=None)
+    parser.add_argument("--overlap", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per size; the best is reported")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = make_text(args.words)
+
+    counter = get_token_counter()
+    # Load the sentencizer outside the timings
+    list(iter_chunks([(1, text[:1000])]))
+    results = run(text, args.strategies.split(","), args.max_tokens, args.overlap, args.repeat)
+    print(json.dumps({
+        "tokenizer": type(counter.tokenizer).__name__ if counter.tokenizer is not None else "estimate",
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Compare embedding strategies on throughput and retrieval quality.
+
+Usage:
+    python -m benchmarks.embedding_strategies [--corpus FILE] [--passages 500]
+        [--strategies single,mean,concat] [--runtimes float32,int8]
+
+Passages come from --corpus (blank-line separated paragraphs of a text
+file) or are generated synthetically. Each query is one sentence taken
+from a passage; retrieval quality is how well that passage is ranked
+among all passages (recall@1, recall@5 and MRR). Embeddings are computed
+directly, bypassing the embedding cache.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_text
+from core.embedder import create_embedder, EMBED_BATCH_SIZE
+
+
+def load_passages(corpus, count, seed=0):
+    if corpus:
+        with open(corpus, encoding="utf-8") as f:
+            passages = [p.strip() for p in re.split(r"\n\s*\n", f.read()) if len(p.split()) >= 20]
+        return passages[:count]
+    return [make_text(120, seed=seed + i) for i in range(count)]
+
+
+def make_queries(passages, seed=0):
+    rng = random.Random(seed)
+    queries = []
+    for passage in passages:
+        sentences = [s for s in re.split(r"(?<=[.!?])\s+", passage) if len(s.split()) >= 4]
+        queries.append(rng.choice(sentences) if sentences else passage[:100])
+    return queries
+
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def evaluate(embedder, passages, queries, batch_size):
+    start = time.perf_counter()
+    passage_vectors = embedder.encode(passages, batch_size)
+    elapsed = time.perf_counter() - start
+    query_vectors = embedder.encode(queries, batch_size)
+
+    scores = normalize(query_vectors) @ normalize(passage_vectors).T
+    # Rank of the source passage (0 = best) for each query
+    ranks = (scores > scores[np.arange(len(queries)), np.arange(len(queries))][:, None]).sum(axis=1)
+    return {
+        "strategy": embedder.strategy,
+        "runtime": "int8" if embedder.quantized else "float32",
+        "model_id": embedder.model_id,
+        "dim": embedder.dim,
+        "texts_per_second": round(len(passages) / elapsed, 1),
+        "recall@1": round(float(np.mean(ranks < 1)), 4),
+        "recall@5": round(float(np.mean(ranks < 5)), 4),
+        "mrr": round(float(np.mean(1 / (ranks + 1))), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Text file of blank-line separated passages")
+    parser.add_argument("--passages", type=int, default=500)
+    parser.add_argument("--strategies", default="single,mean,concat")
+    parser.add_argument("--runtimes", default="float32,int8")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    args = parser.parse_args()
+
+    passages = load_passages(args.corpus, args.passages)
+    queries = make_queries(passages)
+
+    results = []
+    for runtime in args.runtimes.split(","):
+        for strategy in args.strategies.split(","):
+            embedder = create_embedder(strategy, runtime=runtime)
+            # Load models before timing
+            embedder.encode(passages[:1], args.batch_size)
+            result = evaluate(embedder, passages, queries, args.batch_size)
+            print(f"{result['model_id']:60s} {result['texts_per_second']:8.1f} texts/s  "
+                  f"R@1 {result['recall@1']:.3f}  MRR {result['mrr']:.3f}", file=sys.stderr)
+            results.append(result)
+
+    print(json.dumps({"passages": len(passages), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Benchmark parallel PDF extraction from 1 to N worker processes.
+
+Usage:
+    python -m benchmarks.extract_scaling [--pdf FILE] [--pages 200] [--max-workers 8]
+
+Without --pdf, a synthetic PDF with --pages pages is generated.
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_pages, write_pdf
+from core.extractor import iter_pdf_pages_parallel
+
+
+def run(pdf_path, max_workers, pages_per_task, repeat):
+    results = []
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            pages = sum(1 for _ in iter_pdf_pages_parallel(pdf_path, workers=workers, pages_per_task=pages_per_task))
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        baseline = baseline or best
+        results.append({
+            "workers": workers,
+            "pages": pages,
+            "seconds": round(best, 3),
+            "pages_per_second": round(pages / best, 1),
+            "speedup": round(baseline / best, 2),
+        })
+        print(f"workers={workers:2d}  {best:7.3f}s  {pages / best:8.1f} pages/s  speedup x{baseline / best:.2f}",
+              file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="PDF to extract (default: generate a synthetic one)")
+    parser.add_argument("--pages", type=int, default=200, help="Pages in the synthetic PDF")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pages-per-task", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per worker count; the best is reported")
+    args = parser.parse_args()
+
+    # Always exercise the pool, even for short PDFs
+    import core.extractor
+    core.extractor.PDF_PARALLEL_MIN_PAGES = 0
+
+    pdf_path = args.pdf
+    if pdf_path is None:
+        pdf_path = os.path.join(tempfile.mkdtemp(), "synthetic.pdf")
+        write_pdf(pdf_path, make_pages(args.pages))
+
+    results = run(pdf_path, args.max_workers, args.pages_per_task, args.repeat)
+    print(json.dumps({"pdf": pdf_path, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+"""
+HTTP load test of mixed query and ingest traffic against the API.
+
+Usage:
+    python -m benchmarks.load_test [--app-url URL] [--concurrency 1,2,4,8,16,32]
+        [--duration 20] [--ingest-ratio 0.1] [--stream] [--fake-embedder]
+        [--mock-latency-ms 800] [--launcher uvicorn|script]
+        [--extract-workers N] [--output load.json]
+
+Without --app-url, a local mock Gemini server (benchmarks.mock_gemini) and
+the app are started on free ports, with storage in a temporary directory
+and LLM_BACKEND=gemini_rest pointed at the mock. --fake-embedder starts
+the app with EMBEDDING_STRATEGY=hashing and reranking off, for machines
+that cannot download models. --launcher script starts the app with
+`python main.py` instead of `uvicorn main:app`; with --extract-workers
+above 1, the stall test's PDF is extracted in spawned worker processes,
+which re-run main.py on startup.
+
+For each concurrency level, that many clients send requests back to back
+for --duration seconds. A share of --ingest-ratio are PDF uploads and the
+rest are queries (streamed with --stream). The result is one point per
+level on a throughput-versus-latency curve.
+
+A probe requests GET / every --probe-interval-ms throughout. GET / does no
+work, so a slow probe means the event loop was blocked. The stall test
+then compares query latency with and without a large ingest running. The
+event loop counts as blocked when the probe's worst latency exceeds
+--block-threshold-ms, or when p95 query latency more than doubles while
+the ingest runs.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.synthetic import VOCABULARY, make_pages, write_pdf
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def summarize(latencies):
+    if not latencies:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(values),
+        "p50": round(float(p50), 1),
+        "p95": round(float(p95), 1),
+        "p99": round(float(p99), 1),
+        "max": round(float(values.max()), 1),
+    }
+
+
+def make_pdf_bytes(pages, seed):
+    path = os.path.join(tempfile.mkdtemp(), "load.pdf")
+    write_pdf(path, make_pages(pages, seed=seed))
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def start_servers(args, workdir):
+    """
+    Start the mock Gemini server and the app; return (app_url, processes).
+    """
+    mock_port, app_port = free_port(), free_port()
+    mock = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_gemini", "--port", str(mock_port),
+         "--latency-ms", str(args.mock_latency_ms), "--jitter-ms", str(args.mock_jitter_ms)],
+        cwd=BACKEND_DIR,
+    )
+    env = {
+        **os.environ,
+        "DOCCHAT_DATA_DIR": os.path.join(workdir, "data"),
+        "LLM_BACKEND": "gemini_rest",
+        "LLM_API_BASE": f"http://127.0.0.1:{mock_port}",
+    }
+    if args.fake_embedder:
+        env.update({"EMBEDDING_STRATEGY": "hashing", "RERANK_ENABLED": "false"})
+    if args.extract_workers:
+        env["PDF_EXTRACT_WORKERS"] = str(args.extract_workers)
+    if args.launcher == "script":
+        command = [sys.executable, os.path.join(BACKEND_DIR, "main.py")]
+        env["PORT"] = str(app_port)
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR,
+                   "--port", str(app_port), "--log-level", "warning"]
+    # Uploads are written relative to the working directory
+    app = subprocess.Popen(command, cwd=workdir, env=env)
+    return f"http://127.0.0.1:{app_port}", [app, mock]
+
+
+async def wait_ready(client, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/api/ready")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"App not ready after {timeout}s")
+
+
+async def wait_jobs(client, job_ids, timeout=600):
+    deadline = time.monotonic() + timeout
+    pending = set(job_ids)
+    while pending and time.monotonic() < deadline:
+        for job_id in list(pending):
+            status = (await client.get(f"/api/ingest/{job_id}")).json().get("status")
+            if status in ("completed", "failed"):
+                pending.discard(job_id)
+        if pending:
+            await asyncio.sleep(0.5)
+
+
+class Workload:
+    def __init__(self, client, pdf, stream, seed):
+        self.client = client
+        self.pdf = pdf
+        self.stream = stream
+        self.rng = random.Random(seed)
+        self.counter = 0
+
+    def query_text(self):
+        # A running number keeps queries out of the answer cache
+        self.counter += 1
+        return " ".join(self.rng.sample(VOCABULARY, 4)) + f" {self.counter}"
+
+    async def query(self):
+        body = {"query": self.query_text()}
+        if not self.stream:
+            response = await self.client.post("/api/query", json=body)
+            return response.status_code
+        async with self.client.stream("POST", "/api/query/stream", json=body) as response:
+            async for _ in response.aiter_bytes():
+                pass
+            return response.status_code
+
+    async def ingest(self):
+        files = {"file": (f"load-{self.rng.random():.12f}.pdf", self.pdf, "application/pdf")}
+        response = await self.client.post("/api/ingest", files=files, data={"force": "true"})
+        return response.status_code, response.json().get("job_id")
+
+
+async def probe(client, interval, samples, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get("/")
+            samples.append(time.perf_counter() - start)
+        except Exception:
+            pass
+        await asyncio.sleep(interval)
+
+
+async def run_level(client, workload, concurrency, duration, ingest_ratio, probe_interval):
+    results = {"query": [], "ingest": []}
+    errors = {"query": 0, "ingest": 0}
+    probes = []
+    jobs = []
+    stop = asyncio.Event()
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            kind = "ingest" if workload.rng.random() < ingest_ratio else "query"
+            start = time.perf_counter()
+            try:
+                if kind == "ingest":
+                    status, job_id = await workload.ingest()
+                    jobs.append(job_id)
+                else:
+                    status = await workload.query()
+            except Exception:
+                status = None
+            if status is None or status >= 400:
+                errors[kind] += 1
+            else:
+                results[kind].append(time.perf_counter() - start)
+
+    prober = asyncio.create_task(probe(client, probe_interval, probes, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await prober
+    completed = len(results["query"]) + len(results["ingest"])
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "throughput_rps": round(completed / elapsed, 2),
+        "query_rps": round(len(results["query"]) / elapsed, 2),
+        "query_latency_ms": summarize(results["query"]),
+        "ingest_latency_ms": summarize(results["ingest"]),
+        "errors": errors,
+        "probe_latency_ms": summarize(probes),
+    }, jobs
+
+
+async def stall_test(client, workload, big_pdf, duration, probe_interval):
+    """
+    Query latency alone versus while a large document is being ingested.
+    """
+    async def queries(seconds, until_job=None):
+        latencies = []
+        probes = []
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe(client, probe_interval, probes, stop))
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            if until_job is not None and len(latencies) % 5 == 0:
+                status = (await client.get(f"/api/ingest/{until_job}")).json().get("status")
+                if status in ("completed", "failed"):
+                    break
+            start = time.perf_counter()
+            await workload.query()
+            latencies.append(time.perf_counter() - start)
+        stop.set()
+        await prober
+        return summarize(latencies), summarize(probes)
+
+    idle_queries, idle_probes = await queries(duration)
+    files = {"file": ("stall.pdf", big_pdf, "application/pdf")}
+    response = await client.post("/api/ingest", files=files, data={"force": "true"})
+    job_id = response.json().get("job_id")
+    busy_queries, busy_probes = await queries(duration, until_job=job_id)
+    await wait_jobs(client, [job_id])
+    return {
+        "idle": {"query_latency_ms": idle_queries, "probe_latency_ms": idle_probes},
+        "during_ingest": {"query_latency_ms": busy_queries, "probe_latency_ms": busy_probes},
+    }
+
+
+async def run(args, app_url):
+    import httpx
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 8)
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=args.request_timeout) as client:
+        await wait_ready(client, args.ready_timeout)
+
+        small_pdf = make_pdf_bytes(args.ingest_pages, args.seed)
+        workload = Workload(client, small_pdf, args.stream, args.seed)
+
+        # Give queries something to retrieve
+        seed_jobs = [(await workload.ingest())[1] for _ in range(args.seed_docs)]
+        await wait_jobs(client, seed_jobs)
+
+        curve = []
+        all_jobs = []
+        for concurrency in args.concurrency:
+            point, jobs = await run_level(
+                client, workload, concurrency, args.duration, args.ingest_ratio, args.probe_interval_ms / 1000,
+            )
+            all_jobs.extend(jobs)
+            curve.append(point)
+            query = point["query_latency_ms"]
+            print(f"c={concurrency:3d}  {point['throughput_rps']:7.2f} req/s  query p50={query['p50']}ms "
+                  f"p95={query['p95']}ms  probe max={point['probe_latency_ms']['max']}ms  "
+                  f"errors={point['errors']}", file=sys.stderr)
+            # Let background ingestion drain so levels don't bleed into each other
+            await wait_jobs(client, jobs)
+
+        stall = None
+        if args.stall_pages:
+            big_pdf = make_pdf_bytes(args.stall_pages, args.seed + 1)
+            stall = await stall_test(client, workload, big_pdf, args.stall_seconds, args.probe_interval_ms / 1000)
+
+    worst_probe = max((p["probe_latency_ms"]["max"] or 0) for p in curve)
+    if stall:
+        worst_probe = max(worst_probe, stall["during_ingest"]["probe_latency_ms"]["max"] or 0)
+    reasons = []
+    if worst_probe > args.block_threshold_ms:
+        reasons.append(f"probe latency reached {worst_probe}ms (threshold {args.block_threshold_ms}ms)")
+    if stall:
+        idle, busy = stall["idle"]["query_latency_ms"]["p95"], stall["during_ingest"]["query_latency_ms"]["p95"]
+        if idle and busy and busy > 2 * idle:
+            reasons.append(f"query p95 rose from {idle}ms to {busy}ms during ingest")
+    return {
+        "config": {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "ingest_ratio": args.ingest_ratio,
+            "stream": args.stream,
+            "mock_latency_ms": args.mock_latency_ms,
+            "fake_embedder": args.fake_embedder,
+        },
+        "curve": curve,
+        "stall_test": stall,
+        "event_loop_blocked": bool(reasons),
+        "blocking_reasons": reasons,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-url", help="Test a running instance instead of starting one")
+    parser.add_argument("--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per concurrency level")
+    parser.add_argument("--ingest-ratio", type=float, default=0.1)
+    parser.add_argument("--ingest-pages", type=int, default=5, help="Pages per uploaded PDF")
+    parser.add_argument("--seed-docs", type=int, default=5, help="Documents ingested before the run")
+    parser.add_argument("--stream", action="store_true", help="Use /api/query/stream")
+    parser.add_argument("--fake-embedder", action="store_true")
+    parser.add_argument("--launcher", choices=["uvicorn", "script"], default="uvicorn",
+                        help="Start the app with `uvicorn main:app` or `python main.py`")
+    parser.add_argument("--extract-workers", type=int, help="PDF_EXTRACT_WORKERS for the app")
+    parser.add_argument("--mock-latency-ms", type=float, default=800)
+    parser.add_argument("--mock-jitter-ms", type=float, default=200)
+    parser.add_argument("--probe-interval-ms", type=float, default=50)
+    parser.add_argument("--block-threshold-ms", type=float, default=100)
+    parser.add_argument("--stall-pages", type=int, default=200, help="Pages of the stall-test PDF; 0 skips it")
+    parser.add_argument("--stall-seconds", type=float, default=15)
+    parser.add_argument("--request-timeout", type=float, default=120)
+    parser.add_argument("--ready-timeout", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results here as well as to stdout")
+    args = parser.parse_args()
+
+    processes = []
+    app_url = args.app_url
+    if app_url is None:
+        app_url, processes = start_servers(args, tempfile.mkdtemp(prefix="docchat-load-"))
+    try:
+        results = asyncio.run(run(args, app_url))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    if results["event_loop_blocked"]:
+        for reason in results["blocking_reasons"]:
+            print(f"EVENT LOOP BLOCKED: {reason}", file=sys.stderr)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
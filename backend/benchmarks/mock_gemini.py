@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Local stand-in for the Gemini REST API, for load tests.
+
+Usage:
+    python -m benchmarks.mock_gemini [--port 8765] [--latency-ms 800] [--jitter-ms 200]
+        [--stream-chunks 20] [--chunk-delay-ms 25] [--error-rate 0]
+
+Serves generateContent and streamGenerateContent (with alt=sse) for any
+model. Answers arrive after --latency-ms (plus up to --jitter-ms); streams
+send the first chunk after the same delay and the rest --chunk-delay-ms
+apart. --error-rate is the fraction of calls answered with HTTP 503.
+
+Run the app against it with:
+    LLM_BACKEND=gemini_rest LLM_API_BASE=http://127.0.0.1:8765 uvicorn main:app
+
+GET /stats reports calls served and the peak number in flight.
+"""
+
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def create_app(latency_ms=800, jitter_ms=200, stream_chunks=20, chunk_delay_ms=25, error_rate=0.0, seed=0):
+    app = FastAPI(title="Mock Gemini")
+    rng = random.Random(seed)
+    stats = {"calls": 0, "streams": 0, "errors": 0, "in_flight": 0, "peak_in_flight": 0}
+
+    def answer(prompt):
+        docs = prompt.count("\nDoc ") + prompt.startswith("Doc ")
+        words = [f"word{i}" for i in range(stream_chunks * 3)]
+        return f"Mock answer based on {docs} documents [Doc 1]. " + " ".join(words)
+
+    def delay():
+        return (latency_ms + rng.uniform(0, jitter_ms)) / 1000
+
+    def candidate(text, finished):
+        body = {"content": {"role": "model", "parts": [{"text": text}]}}
+        if finished:
+            body["finishReason"] = "STOP"
+        return {"candidates": [body]}
+
+    def prompt_of(body):
+        return "".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+
+    def failed():
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"code": 503, "message": "Mock overload", "status": "UNAVAILABLE"}}, status_code=503)
+        return None
+
+    def enter():
+        stats["in_flight"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        stats["calls"] += 1
+        body = await request.json()
+        enter()
+        try:
+            await asyncio.sleep(delay())
+            return failed() or candidate(answer(prompt_of(body)), True)
+        finally:
+            stats["in_flight"] -= 1
+
+    @app.post("/v1beta/models/{model}:streamGenerateContent")
+    async def stream_generate_content(model: str, request: Request):
+        stats["calls"] += 1
+        stats["streams"] += 1
+        body = await request.json()
+        error = failed()
+        if error is not None:
+            return error
+        words = answer(prompt_of(body)).split(" ")
+        size = max(1, len(words) // stream_chunks)
+        pieces = [" ".join(words[i:i + size]) + " " for i in range(0, len(words), size)]
+
+        async def events():
+            enter()
+            try:
+                await asyncio.sleep(delay())
+                for i, piece in enumerate(pieces):
+                    if i:
+                        await asyncio.sleep(chunk_delay_ms / 1000)
+                    yield f"data: {json.dumps(candidate(piece, i == len(pieces) - 1))}\r\n\r\n"
+            finally:
+                stats["in_flight"] -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--jitter-ms", type=float, default=200)
+    parser.add_argument("--stream-chunks", type=int, default=20)
+    parser.add_argument("--chunk-delay-ms", type=float, default=25)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+    app = create_app(args.latency_ms, args.jitter_ms, args.stream_chunks, args.chunk_delay_ms, args.error_rate, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Report memory saved and recall impact of vector quantization modes.
+
+Usage:
+    python -m benchmarks.quantization_report [--data-dir PATH] [--vectors 20000] [--queries 200]
+
+With --data-dir, vectors are read from a copy of the Qdrant storage folder
+(stop the server first, or point at a copy, as local storage is locked).
+Otherwise clustered synthetic 384-dim vectors are generated.
+
+Qdrant's local mode does not implement quantization, so the scalar (int8)
+and binary schemes are simulated here with NumPy the same way the server
+applies them: approximate scores over quantized vectors select
+limit * oversampling candidates, which are then rescored at full precision.
+"""
+
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def load_collection_vectors(data_dir, collection="documents"):
+    from qdrant_client import QdrantClient
+    client = QdrantClient(path=data_dir)
+    vectors = []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection, limit=1000, offset=offset, with_payload=False, with_vectors=True
+        )
+        vectors.extend(point.vector for point in points)
+        if offset is None:
+            break
+    client.close()
+    return np.array(vectors, dtype=np.float32)
+
+
+def synthetic_vectors(count, dim=384, clusters=50, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, size=count)] + rng.normal(scale=0.6, size=(count, dim))
+    return vectors.astype(np.float32)
+
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def scalar_quantize(vectors, quantile=0.99):
+    lower = np.quantile(vectors, (1 - quantile) / 2)
+    upper = np.quantile(vectors, 1 - (1 - quantile) / 2)
+    scale = (upper - lower) / 255
+    codes = np.round((np.clip(vectors, lower, upper) - lower) / scale).astype(np.uint8)
+    return codes, lower, scale
+
+
+def top_k(scores, k):
+    idx = np.argpartition(-scores, min(k, scores.shape[1] - 1), axis=1)[:, :k]
+    order = np.take_along_axis(scores, idx, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def recall(found, exact):
+    return float(np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, exact)]))
+
+
+def evaluate(vectors, queries, limit, oversampling):
+    exact_scores = queries @ vectors.T
+    exact = top_k(exact_scores, limit)
+    candidates = int(limit * oversampling)
+
+    def rescored(approx_scores):
+        pool = top_k(approx_scores, candidates)
+        full = np.take_along_axis(exact_scores, pool, axis=1)
+        order = full.argsort(axis=1)[:, ::-1][:, :limit]
+        return np.take_along_axis(pool, order, axis=1)
+
+    n, dim = vectors.shape
+    codes, lower, scale = scalar_quantize(vectors)
+    scalar_scores = queries @ (codes.astype(np.float32) * scale + lower).T
+    bits = vectors > 0
+    binary_scores = np.where(queries > 0, 1.0, -1.0) @ np.where(bits, 1.0, -1.0).T
+
+    float_bytes = n * dim * 4
+    report = {"vectors": n, "dim": dim, "limit": limit, "oversampling": oversampling, "modes": {}}
+    for mode, approx, quantized_bytes in (
+        ("none", None, float_bytes),
+        ("scalar", scalar_scores, n * dim),
+        ("binary", binary_scores, n * dim // 8),
+    ):
+        entry = {
+            "search_memory_bytes": quantized_bytes,
+            "memory_saved_bytes": float_bytes - quantized_bytes,
+            "memory_ratio": round(quantized_bytes / float_bytes, 4),
+        }
+        if approx is None:
+            entry["recall"] = 1.0
+        else:
+            entry["recall_without_rescore"] = round(recall(top_k(approx, limit), exact), 4)
+            entry["recall"] = round(recall(rescored(approx), exact), 4)
+        report["modes"][mode] = entry
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", help="Qdrant storage folder to read vectors from")
+    parser.add_argument("--vectors", type=int, default=20000, help="Synthetic vector count")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=3)
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    args = parser.parse_args()
+
+    vectors = load_collection_vectors(args.data_dir) if args.data_dir else synthetic_vectors(args.vectors)
+    if len(vectors) <= args.limit:
+        sys.exit("Not enough vectors to evaluate")
+    vectors = normalize(vectors)
+
+    # Queries are perturbed corpus vectors, so each has close neighbours
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(vectors), size=args.queries)
+    queries = normalize(vectors[picks] + rng.normal(scale=0.02, size=(args.queries, vectors.shape[1])))
+
+    print(json.dumps(evaluate(vectors, queries.astype(np.float32), args.limit, args.oversampling), indent=2))
+
+
+if __name__ == "__main__":
+    main()
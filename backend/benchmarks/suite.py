@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+"""
+End-to-end ingest and query benchmark with offline fakes.
+
+Usage:
+    python -m benchmarks.suite [--docs 20] [--pages 10] [--queries 200] [--seed 0]
+        [--fake-embedder] [--output results.json]
+        [--baseline benchmarks/baseline.json] [--save-baseline] [--tolerance 0.2]
+
+A synthetic corpus of --docs PDFs is generated and run through the real
+extract_text, chunker, embedder and vector store code, in a temporary data
+directory. Queries are then embedded, searched and answered by the fake LLM
+backend. Each stage reports throughput, p50/p95/p99 latency and the peak
+RSS of the process once the stage finishes.
+
+--fake-embedder sets EMBEDDING_STRATEGY=hashing, replacing the
+SentenceTransformer models with deterministic hashed bag-of-words vectors,
+for machines that cannot download models. Compare runs
+only against baselines made with the same options on the same machine.
+
+With --baseline, a stage regresses when its throughput drops, or its p95
+latency grows, by more than --tolerance (a fraction); regressions are
+listed and the exit status is 1. --save-baseline writes the results to
+the --baseline path instead.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Stages whose metrics are compared with the baseline
+COMPARED_STAGES = ("extract", "chunk", "embed", "upsert", "search", "query")
+
+
+def percentiles(samples):
+    import numpy as np
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "mean": None}
+    values = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "mean": round(float(values.mean()), 3),
+    }
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def stage_result(unit, items, latencies, seconds):
+    return {
+        "unit": unit,
+        "items": items,
+        "seconds": round(seconds, 3),
+        "throughput": round(items / seconds, 2) if seconds else None,
+        "latency_ms": percentiles(latencies),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def make_corpus(directory, docs, pages, seed):
+    from benchmarks.synthetic import make_pages, write_pdf
+    paths = []
+    for i in range(docs):
+        path = os.path.join(directory, f"doc-{i:04d}.pdf")
+        write_pdf(path, make_pages(pages, seed=seed + i))
+        paths.append(path)
+    return paths
+
+
+def make_queries(texts, count, seed):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        words = rng.choice(texts).split()
+        start = rng.randrange(max(1, len(words) - 8))
+        queries.append(" ".join(words[start:start + 8]))
+    return queries
+
+
+def run(args):
+    from core.extractor import extract_text
+    from core.chunker import iter_chunks
+    from core.embedder import generate_combined_embeddings, generate_combined_embedding
+    from core.vector_store import insert_vectors, hybrid_search, search_vectors, HYBRID_SEARCH
+    from core.context import select_contexts
+    from core.llm import ask_llm_async
+    from core.pipeline import INGEST_BATCH_SIZE
+
+    # Load the sentencizer, tokenizer and models outside the timings
+    list(iter_chunks([(1, "Warm up the chunker.")]))
+    generate_combined_embeddings(["Warm up the embedder."])
+
+    corpus_dir = tempfile.mkdtemp(prefix="docchat-corpus-")
+    paths = make_corpus(corpus_dir, args.docs, args.pages, args.seed)
+    stages = {}
+
+    # Extract every document, then chunk, embed and upsert, so each stage
+    # is timed on its own
+    latencies = []
+    texts = []
+    start = time.perf_counter()
+    for path in paths:
+        t = time.perf_counter()
+        texts.append(extract_text(path, "application/pdf"))
+        latencies.append(time.perf_counter() - t)
+    stages["extract"] = stage_result("pages", args.docs * args.pages, latencies, time.perf_counter() - start)
+
+    latencies = []
+    documents = []
+    start = time.perf_counter()
+    for text in texts:
+        t = time.perf_counter()
+        pages = [(number, page) for number, page in enumerate(text.split("\f"), start=1)]
+        documents.append(list(iter_chunks(pages, separator="\f")))
+        latencies.append(time.perf_counter() - t)
+    chunk_count = sum(len(chunks) for chunks in documents)
+    stages["chunk"] = stage_result("chunks", chunk_count, latencies, time.perf_counter() - start)
+
+    batches = []
+    for doc_index, chunks in enumerate(documents):
+        for i in range(0, len(chunks), INGEST_BATCH_SIZE):
+            batches.append((f"bench-{doc_index:04d}", i, chunks[i:i + INGEST_BATCH_SIZE]))
+
+    latencies = []
+    embedded = []
+    start = time.perf_counter()
+    for _, _, batch in batches:
+        t = time.perf_counter()
+        embedded.append(generate_combined_embeddings([chunk["text"] for chunk in batch]))
+        latencies.append(time.perf_counter() - t)
+    stages["embed"] = stage_result("chunks", chunk_count, latencies, time.perf_counter() - start)
+
+    latencies = []
+    start = time.perf_counter()
+    for (doc_id, start_idx, batch), embeddings in zip(batches, embedded):
+        t = time.perf_counter()
+        insert_vectors([chunk["text"] for chunk in batch], embeddings, doc_id, start_idx=start_idx)
+        latencies.append(time.perf_counter() - t)
+    stages["upsert"] = stage_result("chunks", chunk_count, latencies, time.perf_counter() - start)
+
+    queries = make_queries([chunk["text"] for chunks in documents for chunk in chunks], args.queries, args.seed)
+
+    search_latencies = []
+    query_latencies = []
+
+    async def answer_all():
+        for query in queries:
+            t = time.perf_counter()
+            embedding = generate_combined_embedding(query)
+            s = time.perf_counter()
+            if HYBRID_SEARCH:
+                results = hybrid_search(query, embedding, limit=3)
+            else:
+                results = search_vectors(embedding, limit=3)
+            search_latencies.append(time.perf_counter() - s)
+            contexts = select_contexts(results)
+            await ask_llm_async(query, contexts)
+            query_latencies.append(time.perf_counter() - t)
+
+    start = time.perf_counter()
+    asyncio.run(answer_all())
+    elapsed = time.perf_counter() - start
+    stages["search"] = stage_result("queries", len(queries), search_latencies, sum(search_latencies))
+    stages["query"] = stage_result("queries", len(queries), query_latencies, elapsed)
+    return stages
+
+
+def compare(results, baseline, tolerance):
+    """
+    List the stages that got slower than the baseline by more than tolerance.
+
+    Returns:
+        List[str]: One message per regression.
+    """
+    regressions = []
+    for name in COMPARED_STAGES:
+        current, previous = results["stages"].get(name), baseline.get("stages", {}).get(name)
+        if not current or not previous:
+            continue
+        if previous["throughput"] and current["throughput"] is not None:
+            change = current["throughput"] / previous["throughput"] - 1
+            if change < -tolerance:
+                regressions.append(f"{name}: throughput {current['throughput']} vs {previous['throughput']} {current['unit']}/s ({change:+.1%})")
+        before, after = previous["latency_ms"]["p95"], current["latency_ms"]["p95"]
+        if before and after is not None:
+            change = after / before - 1
+            if change > tolerance:
+                regressions.append(f"{name}: p95 latency {after} vs {before} ms ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20, help="Synthetic PDFs to ingest")
+    parser.add_argument("--pages", type=int, default=10, help="Pages per PDF")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fake-embedder", action="store_true", help="Use a hashing embedder instead of the models")
+    parser.add_argument("--output", help="Write results here as well as to stdout")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    # Isolate all storage and use the offline LLM before core modules load
+    os.environ["DOCCHAT_DATA_DIR"] = tempfile.mkdtemp(prefix="docchat-data-")
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ.setdefault("LLM_FAKE_LATENCY_MS", "0")
+    os.environ.setdefault("WARMUP_MODELS", "false")
+    if args.fake_embedder:
+        os.environ["EMBEDDING_STRATEGY"] = "hashing"
+
+    stages = run(args)
+    results = {
+        "config": {
+            "docs": args.docs,
+            "pages": args.pages,
+            "queries": args.queries,
+            "seed": args.seed,
+            "fake_embedder": args.fake_embedder,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "stages": stages,
+    }
+
+    for name, stage in stages.items():
+        latency = stage["latency_ms"]
+        print(f"{name:7s} {stage['throughput']:10.1f} {stage['unit']}/s  p50={latency['p50']}ms  "
+              f"p95={latency['p95']}ms  p99={latency['p99']}ms  rss={stage['peak_rss_mb']}MB", file=sys.stderr)
+
+    exit_code = 0
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != results["config"]:
+            print("Baseline was recorded with different options; not comparing", file=sys.stderr)
+        else:
+            regressions = compare(results, baseline, args.tolerance)
+            results["regressions"] = regressions
+            for message in regressions:
+                print(f"REGRESSION {message}", file=sys.stderr)
+            exit_code = 1 if regressions else 0
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
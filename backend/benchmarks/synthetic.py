@@ -0,0 +1,110 @@
+"""
+Synthetic corpus generation for benchmarks.
+
+Produces deterministic English-like text and minimal text-only PDFs, so
+benchmarks can run without real documents.
+"""
+
+import random
+
+VOCABULARY = (
+    "the system document query answer vector index chunk page model cache "
+    "latency throughput request response server client user error code part "
+    "number manual section table figure report policy process data value "
+    "result search embedding token context budget storage memory disk batch "
+    "worker queue job stage metric update version archive upload delete"
+).split()
+
+
+def make_sentence(rng, min_words=6, max_words=20):
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(min_words, max_words))]
+    # Sprinkle identifiers so lexical search has something exact to match
+    if rng.random() < 0.1:
+        words.append(f"ERR-{rng.randint(1000, 9999)}")
+    return " ".join(words).capitalize() + "."
+
+
+def make_pages(num_pages, lines_per_page=40, seed=0):
+    """
+    Generate page texts, each made of lines_per_page lines of sentences.
+
+    Returns:
+        List[List[str]]: Lines for each page.
+    """
+    rng = random.Random(seed)
+    pages = []
+    for _ in range(num_pages):
+        lines = []
+        while len(lines) < lines_per_page:
+            sentence = make_sentence(rng)
+            # Keep lines short enough to fit the page width
+            while len(sentence) > 90:
+                lines.append(sentence[:90])
+                sentence = sentence[90:]
+            lines.append(sentence)
+        pages.append(lines[:lines_per_page])
+    return pages
+
+
+def make_text(num_words, seed=0):
+    rng = random.Random(seed)
+    sentences = []
+    count = 0
+    while count < num_words:
+        sentence = make_sentence(rng)
+        sentences.append(sentence)
+        count += len(sentence.split())
+    return " ".join(sentences)
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, pages):
+    """
+    Write a minimal text-only PDF with one page per entry of pages.
+
+    Args:
+        path (str): Output file path.
+        pages (List[List[str]]): Lines of text for each page.
+    """
+    objects = []  # bodies of objects 1..n
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(None)
+    pages_id = add(None)
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for lines in pages:
+        stream = "BT /F1 10 Tf 12 TL 50 760 Td\n" + "".join(
+            f"({_pdf_escape(line)}) '\n" for line in lines
+        ) + "ET"
+        stream = stream.encode("latin-1", "replace")
+        content_id = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font_id, content_id)
+        ))
+
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref_offset = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                % (len(objects) + 1, catalog_id, xref_offset))
@@ -0,0 +1,117 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 1000))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", 900))
+# Reuse an answer whose query embedding is at least this cosine-similar
+ANSWER_CACHE_SEMANTIC = os.getenv("ANSWER_CACHE_SEMANTIC", "false").lower() in ("1", "true", "yes")
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", 0.95))
+
+
+def normalize_query(query):
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class AnswerCache:
+    """
+    Caches query answers keyed by normalized query, search scope (the doc_id,
+    or the document and date filters) and corpus version.
+
+    Entries expire after a TTL and the oldest entries are evicted once the
+    cache is full. Any change to the corpus bumps the version, so stale
+    answers are never matched. Optionally, a cached answer is reused when a
+    new query embedding is close enough to a cached one (semantic mode).
+    """
+
+    def __init__(self, max_items=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL,
+                 semantic=ANSWER_CACHE_SEMANTIC, similarity=ANSWER_CACHE_SIMILARITY):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.semantic = semantic
+        self.similarity = similarity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def _expire(self, now):
+        for key in [k for k, e in self._entries.items() if now - e["created_at"] > self.ttl]:
+            del self._entries[key]
+
+    def get(self, query, scope, version):
+        key = (normalize_query(query), scope, version)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry["created_at"] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["value"]
+            if entry is not None:
+                del self._entries[key]
+        return None
+
+    def get_similar(self, query_embedding, scope, version):
+        """
+        Return the cached answer whose query embedding is most similar to
+        query_embedding, if it clears the similarity threshold.
+        """
+        if not self.semantic:
+            return None
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            candidates = [
+                (key, e) for key, e in self._entries.items()
+                if key[1] == scope and key[2] == version and e["embedding"] is not None
+            ]
+            if not candidates:
+                return None
+            matrix = np.array([e["embedding"] for _, e in candidates])
+            query = np.asarray(query_embedding, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+            scores = matrix @ query / np.where(norms == 0, 1, norms)
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity:
+                key, entry = candidates[best]
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.semantic_hits += 1
+                return entry["value"]
+        return None
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def put(self, query, scope, version, value, query_embedding=None):
+        key = (normalize_query(query), scope, version)
+        embedding = None
+        if query_embedding is not None:
+            embedding = np.asarray(query_embedding, dtype=np.float32)
+        with self._lock:
+            self._entries[key] = {"value": value, "embedding": embedding, "created_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "items": len(self._entries),
+                "max_items": self.max_items,
+                "ttl_seconds": self.ttl,
+                "semantic": self.semantic,
+            }
+
+
+answer_cache = AnswerCache()
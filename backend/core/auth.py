@@ -2,6 +2,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, HTTPBasic, HTTPBasicCredentials
 import os
 import jwt
+import logging
 from typing import Optional
 from datetime import datetime, timedelta
 
@@ -25,6 +26,8 @@ class NoErrorHTTPBearer(HTTPBearer):
 security = NoErrorHTTPBearer()  # Replace with a version that never raises errors
 optional_security = OptionalHTTPBearer()
 
+logger = logging.getLogger(__name__)
+
 # Get secret key from environment variable
 JWT_SECRET = os.getenv("JWT_SECRET", "your-default-secret-key")
 
@@ -33,8 +36,9 @@ def verify_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(s
     Verify JWT token from authorization header
     TEMPORARY FIX: Always return a valid user ID to bypass authentication issues
     """
-    # For now, always return a valid payload to bypass authentication
-    print("AUTH BYPASS ACTIVE: Using debug token - authentication is disabled")
+    # For now, always return a valid payload to bypass authentication.
+    # Logged at debug level: main.py already warns once at startup
+    logger.debug("AUTH BYPASS ACTIVE: Using debug token - authentication is disabled")
     return {"id": "debug-user"}
     
     # Previous authentication code is kept for reference
@@ -0,0 +1,106 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from core.config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PATH = os.path.join(DATA_DIR, "catalog.sqlite")
+
+
+class DocumentCatalog:
+    """
+    Persistent per-document metadata, maintained alongside the vector store.
+
+    Listing documents reads this table instead of scanning chunk points.
+    """
+
+    def __init__(self, path=CATALOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                filename TEXT,
+                content_type TEXT,
+                chunks INTEGER NOT NULL DEFAULT 0,
+                byte_size INTEGER,
+                ingested_at REAL NOT NULL,
+                content_hash TEXT
+            )"""
+        )
+        # Catalogs created before content hashing lack the column
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(documents)")}
+        if "content_hash" not in columns:
+            self._conn.execute("ALTER TABLE documents ADD COLUMN content_hash TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_ingested_at ON documents (ingested_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_content_hash ON documents (content_hash)")
+        self._conn.commit()
+
+    def register(self, doc_id, filename=None, content_type=None, byte_size=None, content_hash=None):
+        """
+        Create or update the catalog entry for a document.
+        """
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO documents (doc_id, filename, content_type, byte_size, ingested_at, content_hash)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(doc_id) DO UPDATE SET
+                       filename = COALESCE(excluded.filename, filename),
+                       content_type = COALESCE(excluded.content_type, content_type),
+                       byte_size = COALESCE(excluded.byte_size, byte_size),
+                       content_hash = COALESCE(excluded.content_hash, content_hash)""",
+                (doc_id, filename, content_type, byte_size, time.time(), content_hash),
+            )
+            self._conn.commit()
+
+    def add_chunks(self, doc_id, count):
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO documents (doc_id, chunks, ingested_at) VALUES (?, ?, ?)
+                   ON CONFLICT(doc_id) DO UPDATE SET chunks = chunks + excluded.chunks""",
+                (doc_id, count, time.time()),
+            )
+            self._conn.commit()
+
+    def remove(self, doc_id):
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def get(self, doc_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        return dict(row) if row else None
+
+    def find_by_hash(self, content_hash):
+        """
+        Return the most recent document with the given content hash, if any.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM documents WHERE content_hash = ? ORDER BY ingested_at DESC LIMIT 1",
+                (content_hash,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list(self, offset=0, limit=100):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM documents ORDER BY ingested_at DESC, doc_id LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+catalog = DocumentCatalog()
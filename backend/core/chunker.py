@@ -1,74 +1,388 @@
-import spacy
-from sklearn.neighbors import NearestNeighbors
+import os
+import re
+import logging
 import numpy as np
-from core.embedder import generate_combined_embedding
-
-def chunk_text(text, max_words=200, overlap=20):
-    nlp = spacy.load("en_core_web_sm")
-    doc = nlp(text)
-    sentences = [sent.text for sent in doc.sents]
-
-    chunks = []
-    current_chunk = []
-    current_length = 0
-
-    for sentence in sentences:
-        sentence_length = len(sentence.split())
-        if current_length + sentence_length > max_words:
-            chunks.append(" ".join(current_chunk))
-            # Start a new chunk with overlap
-            current_chunk = current_chunk[-overlap:] if overlap > 0 else []
-            current_length = len(" ".join(current_chunk).split())
-        current_chunk.append(sentence)
-        current_length += sentence_length
+from collections import deque, namedtuple
+from itertools import islice
+from importlib.util import find_spec
+from core.embedder import generate_combined_embeddings, embedder
+from core.registry import registry
+
+logger = logging.getLogger(__name__)
+has_faiss = find_spec("faiss") is not None
+
+# Documents with more chunks than this use an approximate HNSW index
+# (when faiss is installed) instead of exact blocked search
+NEIGHBOR_EXACT_MAX = int(os.getenv("NEIGHBOR_EXACT_MAX", 5000))
+
+# "sentence" packs whole sentences, "window" slides a fixed token window,
+# "paragraph" packs whole paragraphs (splitting oversized ones by sentence),
+# "semantic" cuts between sentences where their embeddings diverge
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "sentence").lower()
+# Chunk size and overlap in embedding-model tokens; the size is capped at
+# what the shortest-input model reads, so no chunk is silently truncated
+# when embedded
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 256))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 32))
+
+# Semantic chunking: sentences embedded per batch, the percentile of
+# adjacent-sentence similarities below which a boundary is placed, the
+# smallest chunk cut at a boundary, and whether chunk embeddings are
+# derived from the sentence embeddings instead of embedding chunks again
+SEMANTIC_BATCH_SENTENCES = int(os.getenv("SEMANTIC_BATCH_SENTENCES", 512))
+SEMANTIC_BREAKPOINT_PERCENTILE = float(os.getenv("SEMANTIC_BREAKPOINT_PERCENTILE", 10))
+SEMANTIC_MIN_TOKENS = int(os.getenv("SEMANTIC_MIN_TOKENS", 64))
+SEMANTIC_REUSE_EMBEDDINGS = os.getenv("SEMANTIC_REUSE_EMBEDDINGS", "true").lower() == "true"
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+# Runs of text not containing a blank line
+_PARAGRAPH_RE = re.compile(r"(?:[^\n]|\n(?![ \t\r\f\v]*\n))+")
+
+# A sentence, paragraph or token run: page number, document character
+# offsets, text and token count
+Unit = namedtuple("Unit", ["page", "start", "end", "text", "tokens"])
+
+class TokenCounter:
+    """
+    Token spans as seen by the embedding model.
+
+    Uses the model's fast tokenizer when it can be loaded; otherwise words
+    are estimated as one token per four characters, like core.context.
+    """
+
+    def __init__(self, tokenizer=None, max_length=None):
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+
+    def spans(self, texts):
+        """
+        Args:
+            texts (List[str]): Texts to tokenize together.
+
+        Returns:
+            List[List[Tuple[int, int]]]: Character span of every token, per text.
+        """
+        if self.tokenizer is not None:
+            encoded = self.tokenizer(list(texts), add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+            return [[tuple(span) for span in spans] for spans in encoded["offset_mapping"]]
+        result = []
+        for text in texts:
+            spans = []
+            for match in _TOKEN_RE.finditer(text):
+                for start in range(match.start(), match.end(), 4):
+                    spans.append((start, min(start + 4, match.end())))
+            result.append(spans)
+        return result
+
+    def count(self, texts):
+        return [len(spans) for spans in self.spans(texts)]
+
+_token_counter = None
+
+def get_token_counter():
+    """
+    Token counter for the embedding models, created once.
+
+    Tokens are counted with the first model's tokenizer and capped at the
+    smallest max_seq_length of all the models, so no model of an ensemble
+    truncates a chunk.
+    """
+    global _token_counter
+    if _token_counter is None and not embedder.model_keys:
+        # Model-free embedders have no tokenizer
+        _token_counter = TokenCounter()
+    if _token_counter is None:
+        try:
+            models = [registry.get(key) for key in embedder.model_keys]
+            max_seq_length = min(model.max_seq_length for model in models)
+            # Two positions are taken by the special tokens added when encoding
+            _token_counter = TokenCounter(models[0].tokenizer, max_seq_length - 2)
+        except Exception as e:
+            logger.warning(f"Embedding tokenizer unavailable ({e}); estimating token counts")
+            _token_counter = TokenCounter()
+    return _token_counter
+
+def _strip_span(text, start, end):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+def _split_units(page, offset, text, spans, counter, max_tokens):
+    """
+    Turn (start, end) spans of a page into Units, cutting any span longer
+    than max_tokens into token runs.
+    """
+    spans = [span for span in (_strip_span(text, start, end) for start, end in spans) if span[0] < span[1]]
+    pieces = [text[start:end] for start, end in spans]
+    for (start, end), piece, token_spans in zip(spans, pieces, counter.spans(pieces)):
+        if len(token_spans) <= max_tokens:
+            yield Unit(page, offset + start, offset + end, piece, len(token_spans))
+            continue
+        for i in range(0, len(token_spans), max_tokens):
+            run = token_spans[i:i + max_tokens]
+            run_start, run_end = start + run[0][0], start + run[-1][1]
+            yield Unit(page, offset + run_start, offset + run_end, text[run_start:run_end], len(run))
+
+def _sentence_spans(nlp, text):
+    return [(sent.start_char, sent.end_char) for sent in nlp(text).sents]
+
+def _paragraph_spans(text):
+    return [match.span() for match in _PARAGRAPH_RE.finditer(text)]
+
+def _iter_units(pages, strategy, counter, max_tokens, separator):
+    nlp = registry.get("sentencizer")
+    offset = 0
+    for page_number, text in pages:
+        if text and text.strip():
+            if strategy == "paragraph":
+                for unit in _split_units(page_number, offset, text, _paragraph_spans(text), counter, float("inf")):
+                    if unit.tokens <= max_tokens:
+                        yield unit
+                        continue
+                    # Oversized paragraphs fall back to sentence packing
+                    local = unit.start - offset
+                    spans = [(local + start, local + end) for start, end in _sentence_spans(nlp, unit.text)]
+                    yield from _split_units(page_number, offset, text, spans, counter, max_tokens)
+            elif strategy == "window":
+                # Every token is its own unit, so packing gives a sliding
+                # window; each carries the whitespace that follows it so the
+                # chunk text keeps the source spacing
+                spans = counter.spans([text])[0]
+                for i, (start, end) in enumerate(spans):
+                    follow = text[start:spans[i + 1][0]] if i + 1 < len(spans) else text[start:end] + " "
+                    yield Unit(page_number, offset + start, offset + end, follow, 1)
+            else:
+                yield from _split_units(page_number, offset, text, _sentence_spans(nlp, text), counter, max_tokens)
+        offset += len(text or "") + len(separator)
+
+def _make_chunk(units, tokens, strategy):
+    if strategy == "window":
+        text = "".join(unit.text for unit in units).strip()
+    else:
+        text = " ".join(unit.text for unit in units)
+    return {
+        "text": text,
+        "page_start": units[0].page,
+        "page_end": units[-1].page,
+        "char_start": units[0].start,
+        "char_end": units[-1].end,
+        "tokens": tokens,
+    }
+
+def semantic_breaks(embeddings, previous=None, percentile=None):
+    """
+    Mark sentences that start a new topic.
+
+    Args:
+        embeddings (np.ndarray): Sentence embeddings of shape (n, dim), in order.
+        previous (np.ndarray): Normalized embedding of the sentence before
+            the first one, if any.
+        percentile (float): Adjacent similarities at or below this
+            percentile of the batch are boundaries; defaults to
+            SEMANTIC_BREAKPOINT_PERCENTILE.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Boolean array of shape (n,), True
+        where sentence i differs sharply from sentence i - 1, and the
+        normalized embeddings.
+    """
+    percentile = SEMANTIC_BREAKPOINT_PERCENTILE if percentile is None else percentile
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1, norms)
+
+    similarities = np.ones(len(vectors), dtype=np.float32)
+    if len(vectors) > 1:
+        similarities[1:] = np.einsum("ij,ij->i", vectors[1:], vectors[:-1])
+    if previous is not None and len(vectors):
+        similarities[0] = vectors[0] @ previous
+    elif len(vectors) > 1:
+        # Nothing before the first sentence; keep it out of the percentile
+        similarities[0] = similarities[1:].max()
+    if len(vectors) < 2:
+        return np.zeros(len(vectors), dtype=bool), vectors
+    threshold = np.percentile(similarities, percentile)
+    # Ties at the threshold count, but a flat run of similarities has no drop
+    breaks = (similarities <= threshold) & (similarities < np.median(similarities))
+    return breaks, vectors
+
+def _iter_semantic_chunks(units, max_tokens, batch_size=None):
+    """
+    Pack sentences into chunks, cutting at similarity drops.
+
+    Sentences are embedded SEMANTIC_BATCH_SENTENCES at a time, which also
+    fills the embedding cache. A chunk ends at a boundary once it holds
+    SEMANTIC_MIN_TOKENS tokens, and always before exceeding max_tokens.
+    """
+    window = []
+    vectors = []
+    tokens = 0
+    previous = None
+
+    def make_chunk():
+        chunk = _make_chunk(window, tokens, "semantic")
+        if SEMANTIC_REUSE_EMBEDDINGS:
+            # Mean of the sentence embeddings stands in for the chunk's own
+            chunk["embedding"] = np.mean(vectors, axis=0)
+        return chunk
+
+    units = iter(units)
+    while True:
+        batch = list(islice(units, SEMANTIC_BATCH_SENTENCES))
+        if not batch:
+            break
+        embeddings = generate_combined_embeddings([unit.text for unit in batch], batch_size=batch_size)
+        breaks, normalized = semantic_breaks(embeddings, previous)
+        previous = normalized[-1]
+        for unit, vector, is_break in zip(batch, normalized, breaks):
+            if window and (tokens + unit.tokens > max_tokens or (is_break and tokens >= SEMANTIC_MIN_TOKENS)):
+                yield make_chunk()
+                window, vectors, tokens = [], [], 0
+            window.append(unit)
+            vectors.append(vector)
+            tokens += unit.tokens
 
     # Add the last chunk
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
+    if window:
+        yield make_chunk()
 
-    return chunks
+def iter_chunks(pages, max_tokens=None, overlap=None, strategy=None, separator=""):
+    """
+    Incrementally chunk a stream of pages in one linear pass.
+
+    Pages are split into units (sentences, paragraphs or tokens, depending
+    on the strategy) that are packed into chunks of at most max_tokens
+    embedding-model tokens. When a chunk is emitted, its trailing units
+    holding up to overlap tokens start the next one. Only one page is
+    sentence-split at a time, and chunks may span page boundaries.
+
+    Args:
+        pages (Iterable[Tuple[int, str]]): (page_number, text) pairs.
+        max_tokens (int): Maximum tokens per chunk; defaults to
+            CHUNK_MAX_TOKENS, capped at the smallest model input length.
+        overlap (int): Tokens shared with the previous chunk; defaults to
+            CHUNK_OVERLAP_TOKENS.
+        strategy (str): "sentence", "window", "paragraph" or "semantic";
+            defaults to CHUNK_STRATEGY. Semantic chunks have no overlap and
+            carry an "embedding" when SEMANTIC_REUSE_EMBEDDINGS is on.
+        separator (str): String between pages in the full document text,
+            used for character offsets ("\\f" for PDFs).
+
+    Yields:
+        dict: Chunk with "text", "page_start", "page_end", "char_start",
+        "char_end" and "tokens". Offsets index the document text.
+    """
+    strategy = (strategy or CHUNK_STRATEGY).lower()
+    if strategy not in ("sentence", "window", "paragraph", "semantic"):
+        raise ValueError(f"Unknown chunking strategy '{strategy}'. Choose from: sentence, window, paragraph, semantic")
+    counter = get_token_counter()
+    max_tokens = max_tokens or CHUNK_MAX_TOKENS
+    if counter.max_length:
+        max_tokens = min(max_tokens, counter.max_length)
+    overlap = CHUNK_OVERLAP_TOKENS if overlap is None else overlap
+    overlap = min(overlap, max_tokens - 1)
+
+    if strategy == "semantic":
+        yield from _iter_semantic_chunks(_iter_units(pages, "sentence", counter, max_tokens, separator), max_tokens)
+        return
+
+    window = deque()
+    tokens = 0
+    for unit in _iter_units(pages, strategy, counter, max_tokens, separator):
+        if window and tokens + unit.tokens > max_tokens:
+            yield _make_chunk(window, tokens, strategy)
+            # Keep at most overlap tokens, and leave room for the new unit
+            while window and (tokens > overlap or tokens + unit.tokens > max_tokens):
+                tokens -= window.popleft().tokens
+        window.append(unit)
+        tokens += unit.tokens
+
+    # Add the last chunk
+    if window:
+        yield _make_chunk(window, tokens, strategy)
 
-def chunk_text_with_embeddings(text, max_words=200, overlap=20):
+def chunk_text(text, max_tokens=None, overlap=None, strategy=None):
+    """
+    Chunk a single text; see iter_chunks.
+
+    Returns:
+        List[str]: Chunk texts.
+    """
+    return [chunk["text"] for chunk in iter_chunks([(1, text)], max_tokens, overlap, strategy)]
+
+def chunk_text_with_embeddings(text, max_tokens=None, overlap=None, batch_size=None, strategy=None):
     """
     Chunk text into segments and generate embeddings for each chunk.
 
+    All chunk texts are produced first and then embedded together in
+    batches, rather than running one forward pass per chunk.
+
     Args:
         text (str): The input text to chunk.
-        max_words (int): Maximum number of words per chunk.
-        overlap (int): Number of overlapping words between chunks.
+        max_tokens (int): Maximum tokens per chunk.
+        overlap (int): Number of overlapping tokens between chunks.
+        batch_size (int): Number of chunks per embedding forward pass.
+        strategy (str): Chunking strategy; see iter_chunks.
 
     Returns:
         List[dict]: List of chunks with their embeddings.
     """
-    from spacy.lang.en import English
-    nlp = English()
-    nlp.add_pipe("sentencizer")
-    doc = nlp(text)
-    sentences = [sent.text for sent in doc.sents]
-
-    chunks = []
-    current_chunk = []
-    current_length = 0
-
-    for sentence in sentences:
-        sentence_length = len(sentence.split())
-        if current_length + sentence_length > max_words:
-            chunk_text = " ".join(current_chunk)
-            chunk_embedding = generate_combined_embedding(chunk_text)
-            chunks.append({"text": chunk_text, "embedding": chunk_embedding})
-            # Start a new chunk with overlap
-            current_chunk = current_chunk[-overlap:] if overlap > 0 else []
-            current_length = len(" ".join(current_chunk).split())
-        current_chunk.append(sentence)
-        current_length += sentence_length
+    chunks = list(iter_chunks([(1, text)], max_tokens=max_tokens, overlap=overlap, strategy=strategy))
+    # Semantic chunks may already carry embeddings derived from their sentences
+    pending = [chunk for chunk in chunks if "embedding" not in chunk]
+    if pending:
+        embeddings = generate_combined_embeddings([chunk["text"] for chunk in pending], batch_size=batch_size)
+        for chunk, embedding in zip(pending, embeddings):
+            chunk["embedding"] = embedding
+    return chunks
 
-    # Add the last chunk
-    if current_chunk:
-        chunk_text = " ".join(current_chunk)
-        chunk_embedding = generate_combined_embedding(chunk_text)
-        chunks.append({"text": chunk_text, "embedding": chunk_embedding})
+def nearest_neighbors(embeddings, k=2, block_size=1024):
+    """
+    Find the k most similar other chunks for every chunk by cosine similarity.
 
-    return chunks
+    Small documents use exact search in blocks of block_size rows, so memory
+    stays at block_size * n scores. Large documents use a faiss HNSW index
+    when available.
+
+    Args:
+        embeddings (np.ndarray): Array of shape (n, dim).
+        k (int): Neighbors per chunk, excluding the chunk itself.
+
+    Returns:
+        np.ndarray: Array of shape (n, min(k, n - 1)) with neighbor indices,
+        most similar first.
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    n = len(vectors)
+    k = min(k, n - 1)
+    if k <= 0:
+        return np.empty((n, 0), dtype=np.int64)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1, norms)
+
+    if n > NEIGHBOR_EXACT_MAX and has_faiss:
+        import faiss
+        index = faiss.IndexHNSWFlat(vectors.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+        index.add(vectors)
+        _, found = index.search(vectors, k + 1)
+        result = np.full((n, k), -1, dtype=np.int64)
+        for i, row in enumerate(found):
+            # Drop the chunk itself and faiss's -1 padding
+            others = [j for j in row if j != i and j >= 0][:k]
+            result[i, :len(others)] = others
+        return result
+
+    result = np.empty((n, k), dtype=np.int64)
+    for start in range(0, n, block_size):
+        scores = vectors[start:start + block_size] @ vectors.T
+        rows = np.arange(scores.shape[0])
+        scores[rows, start + rows] = -np.inf
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        result[start:start + block_size] = np.take_along_axis(top, order, axis=1)
+    return result
 
 def cluster_chunks(chunks, n_neighbors=2):
     """
@@ -76,12 +390,11 @@ def cluster_chunks(chunks, n_neighbors=2):
 
     Args:
         chunks (List[dict]): List of chunks with their embeddings.
-        n_neighbors (int): Number of neighbors for KNN.
+        n_neighbors (int): Number of neighbors for KNN, including the chunk itself.
 
     Returns:
         List[List[int]]: Indices of nearest neighbors for each chunk.
     """
     embeddings = np.array([chunk["embedding"] for chunk in chunks])
-    knn = NearestNeighbors(n_neighbors=n_neighbors, metric="cosine").fit(embeddings)
-    distances, indices = knn.kneighbors(embeddings)
-    return indices
+    neighbors = nearest_neighbors(embeddings, k=n_neighbors - 1)
+    return np.hstack([np.arange(len(embeddings))[:, None], neighbors])
@@ -0,0 +1,6 @@
+import os
+
+# Root of all persistent state: the vector collection, catalog, lexical
+# index and embedding cache. DOCCHAT_DATA_DIR moves it, e.g. so benchmarks
+# never touch real data.
+DATA_DIR = os.getenv("DOCCHAT_DATA_DIR") or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
@@ -0,0 +1,137 @@
+import os
+import re
+import math
+
+# Maximum estimated tokens of retrieved text placed in the prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 2000))
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+_stats = {"prompts": 0, "prompt_tokens": 0, "max_prompt_tokens": 0, "chunks_dropped": 0, "sentences_deduplicated": 0}
+
+
+def estimate_tokens(text):
+    """
+    Estimate the LLM token count of text locally.
+
+    Punctuation counts as one token and words as one token per four
+    characters, which tracks subword tokenizers closely enough for budgeting.
+    """
+    return sum(max(1, math.ceil(len(token) / 4)) for token in _TOKEN_RE.findall(text))
+
+
+def _sentence_key(sentence):
+    return " ".join(sentence.lower().split())
+
+
+def _pack(contexts, budget):
+    """
+    Returns:
+        Tuple[List[Tuple[int, str]], int, int]: (index, packed text) of each
+        included context, tokens used, and sentences deduplicated.
+    """
+    # Sentences included so far, per document
+    seen = {}
+    packed = []
+    used_tokens = 0
+    deduplicated = 0
+
+    for index, context in enumerate(contexts):
+        if used_tokens >= budget:
+            break
+        doc_id = context.get("doc_id")
+        earlier = seen.get(doc_id, set()) if doc_id is not None else set()
+        sentences = []
+        keys = []
+        for sentence in _SENTENCE_RE.split(context.get("text", "")):
+            key = _sentence_key(sentence)
+            if not key:
+                continue
+            # Only overlap with another chunk of the same document is
+            # dropped; repeats within a chunk or across documents carry meaning
+            if key in earlier:
+                deduplicated += 1
+                continue
+            tokens = estimate_tokens(sentence)
+            if used_tokens + tokens > budget:
+                break
+            keys.append(key)
+            sentences.append(sentence)
+            used_tokens += tokens
+        if doc_id is not None:
+            seen.setdefault(doc_id, set()).update(keys)
+        if sentences:
+            packed.append((index, " ".join(sentences)))
+    return packed, used_tokens, deduplicated
+
+
+def pack_contexts(contexts, budget=None):
+    """
+    Build the prompt context from retrieved chunks.
+
+    Chunks are taken in the given (relevance) order. Sentences already
+    included from an earlier chunk of the same document, such as chunker
+    overlap, are removed, and chunks are added until the token budget is
+    spent; the last chunk may be cut at a sentence boundary.
+
+    Args:
+        contexts (List[dict]): Retrieved payloads with "text" and "doc_id"
+            fields, most relevant first.
+        budget (int): Token budget; defaults to CONTEXT_TOKEN_BUDGET.
+
+    Returns:
+        Tuple[List[dict], dict]: Copies of the included payloads with
+        deduplicated text, and stats with context_tokens, chunks_used,
+        chunks_dropped and sentences_deduplicated.
+    """
+    budget = CONTEXT_TOKEN_BUDGET if budget is None else budget
+    included, used_tokens, deduplicated = _pack(contexts, budget)
+    packed = [{**contexts[index], "text": text} for index, text in included]
+
+    _stats["chunks_dropped"] += len(contexts) - len(packed)
+    _stats["sentences_deduplicated"] += deduplicated
+    return packed, {
+        "context_tokens": used_tokens,
+        "chunks_used": len(packed),
+        "chunks_dropped": len(contexts) - len(packed),
+        "sentences_deduplicated": deduplicated,
+    }
+
+
+def select_contexts(contexts, budget=None):
+    """
+    The payloads pack_contexts would include, unchanged.
+
+    Used for the sources returned to clients, so they line up with the
+    Doc numbers in the prompt but show the stored chunk text.
+    """
+    budget = CONTEXT_TOKEN_BUDGET if budget is None else budget
+    included, _, _ = _pack(contexts, budget)
+    return [contexts[index] for index, _ in included]
+
+
+def record_prompt(prompt):
+    """
+    Record the estimated token count of a prompt sent to the LLM.
+
+    Returns:
+        int: Estimated prompt tokens.
+    """
+    tokens = estimate_tokens(prompt)
+    _stats["prompts"] += 1
+    _stats["prompt_tokens"] += tokens
+    _stats["max_prompt_tokens"] = max(_stats["max_prompt_tokens"], tokens)
+    return tokens
+
+
+def context_stats():
+    prompts = _stats["prompts"]
+    return {
+        "token_budget": CONTEXT_TOKEN_BUDGET,
+        "prompts": prompts,
+        "avg_prompt_tokens": round(_stats["prompt_tokens"] / prompts, 1) if prompts else None,
+        "max_prompt_tokens": _stats["max_prompt_tokens"],
+        "chunks_dropped": _stats["chunks_dropped"],
+        "sentences_deduplicated": _stats["sentences_deduplicated"],
+    }
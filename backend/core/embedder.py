@@ -1,13 +1,188 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
+import os
+import zlib
+from abc import ABC, abstractmethod
+from core.embedding_cache import embedding_cache, EMBED_CACHE_ENABLED
+from core.registry import registry, register_sentence_transformer
+from core.metrics import EMBED_SECONDS
 
-# Load multiple Sentence Transformers models
-model1 = SentenceTransformer("all-MiniLM-L6-v2")
-model2 = SentenceTransformer("paraphrase-MiniLM-L12-v2")
+# Sentence Transformers models to embed with, loaded once through the registry
+EMBEDDING_MODELS = [
+    name.strip()
+    for name in os.getenv("EMBEDDING_MODELS", "all-MiniLM-L6-v2,paraphrase-MiniLM-L12-v2").split(",")
+    if name.strip()
+]
+# How model outputs are combined: "single" (first model only), "mean" or
+# "concat"; "hashing" uses no model at all, for offline load tests
+EMBEDDING_STRATEGY = os.getenv("EMBEDDING_STRATEGY", "mean").lower()
+# "float32", or "int8" for dynamically quantized models on CPU
+EMBEDDING_RUNTIME = os.getenv("EMBEDDING_RUNTIME", "float32").lower()
+
+# Number of texts sent through each model in a single forward pass
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 32))
+
+# Vector size of the "hashing" strategy
+HASHING_DIM = int(os.getenv("HASHING_DIM", 384))
+
+# Output sizes of known models, so the dimension is available without loading them
+KNOWN_DIMS = {
+    "all-MiniLM-L6-v2": 384,
+    "paraphrase-MiniLM-L12-v2": 384,
+}
+
+
+class Embedder(ABC):
+    """
+    Embeds texts with one or more SentenceTransformer models and combines
+    their outputs according to the strategy.
+    """
+
+    strategy = None
+
+    def __init__(self, model_names, quantized=False, warmup=False):
+        if not model_names:
+            raise ValueError("At least one embedding model is required")
+        self.model_names = list(model_names)
+        self.quantized = quantized
+        self.model_keys = [register_sentence_transformer(name, quantized, warmup) for name in self.model_names]
+
+    @property
+    def model_id(self):
+        """
+        Identity of the embedding configuration, used to key cached vectors.
+        """
+        runtime = ":int8" if self.quantized else ""
+        return f"{'+'.join(self.model_names)}:{self.strategy}{runtime}"
+
+    def model_dim(self, index):
+        name = self.model_names[index]
+        if name in KNOWN_DIMS:
+            return KNOWN_DIMS[name]
+        return registry.get(self.model_keys[index]).get_sentence_embedding_dimension()
+
+    @property
+    @abstractmethod
+    def dim(self):
+        """
+        Length of the vectors returned by encode.
+        """
+
+    @abstractmethod
+    def encode(self, texts, batch_size):
+        """
+        Embed texts.
+
+        Returns:
+            np.ndarray: (len(texts), dim) array of vectors.
+        """
+
+    def _encode_each(self, texts, batch_size):
+        outputs = []
+        for key in self.model_keys:
+            model = registry.get(key)
+            with EMBED_SECONDS.time(key):
+                outputs.append(model.encode(texts, batch_size=batch_size))
+        return outputs
+
+
+class SingleModelEmbedder(Embedder):
+    strategy = "single"
+
+    def __init__(self, model_names, quantized=False, warmup=False):
+        super().__init__(model_names[:1], quantized, warmup)
+
+    @property
+    def dim(self):
+        return self.model_dim(0)
+
+    def encode(self, texts, batch_size):
+        return np.asarray(self._encode_each(texts, batch_size)[0], dtype=np.float32)
+
+
+class MeanEnsembleEmbedder(Embedder):
+    strategy = "mean"
+
+    @property
+    def dim(self):
+        dims = {self.model_dim(i) for i in range(len(self.model_names))}
+        if len(dims) != 1:
+            raise ValueError(f"Averaged models must have the same dimension, got {sorted(dims)}")
+        return dims.pop()
+
+    def encode(self, texts, batch_size):
+        # Combine embeddings by averaging, row-wise
+        return np.mean(self._encode_each(texts, batch_size), axis=0).astype(np.float32)
+
+
+class ConcatEnsembleEmbedder(Embedder):
+    strategy = "concat"
+
+    @property
+    def dim(self):
+        return sum(self.model_dim(i) for i in range(len(self.model_names)))
+
+    def encode(self, texts, batch_size):
+        # Normalize each model's output so every model weighs equally under cosine
+        parts = []
+        for embeddings in self._encode_each(texts, batch_size):
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            parts.append(embeddings / np.where(norms == 0, 1, norms))
+        return np.concatenate(parts, axis=1)
+
+
+class HashingEmbedder(Embedder):
+    """
+    Deterministic bag-of-words vectors with no model to load.
+
+    An offline stand-in for benchmarks and load tests; retrieval quality is
+    far below the real models.
+    """
+
+    strategy = "hashing"
+
+    def __init__(self, model_names=None, quantized=False, warmup=False):
+        self.model_names = ["hashing"]
+        self.quantized = False
+        self.model_keys = []
+
+    @property
+    def dim(self):
+        return HASHING_DIM
+
+    def encode(self, texts, batch_size):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.strip(".,;:!?").encode("utf-8")) % self.dim] += 1.0
+        return vectors
+
+
+EMBEDDERS = {
+    "single": SingleModelEmbedder,
+    "mean": MeanEnsembleEmbedder,
+    "concat": ConcatEnsembleEmbedder,
+    "hashing": HashingEmbedder,
+}
+
+def create_embedder(strategy=EMBEDDING_STRATEGY, model_names=None, runtime=EMBEDDING_RUNTIME, warmup=False):
+    """
+    Build an embedder. Only models of embedders created with warmup=True are
+    loaded at startup and gate readiness.
+    """
+    if strategy not in EMBEDDERS:
+        raise ValueError(f"Unknown EMBEDDING_STRATEGY: {strategy}")
+    if runtime not in ("float32", "int8"):
+        raise ValueError(f"Unknown EMBEDDING_RUNTIME: {runtime}")
+    return EMBEDDERS[strategy](model_names or EMBEDDING_MODELS, quantized=runtime == "int8", warmup=warmup)
+
+embedder = create_embedder(warmup=True)
+EMBEDDING_DIM = embedder.dim
+MODEL_ID = embedder.model_id
 
 def generate_combined_embedding(text):
     """
-    Generate embeddings using multiple models and combine them by averaging.
+    Generate an embedding using the configured models and strategy.
     
     Args:
         text (str): The input text to embed.
@@ -15,20 +190,58 @@ def generate_combined_embedding(text):
     Returns:
         np.ndarray: Combined embedding vector.
     """
-    embedding1 = model1.encode(text)
-    embedding2 = model2.encode(text)
-    # Combine embeddings by averaging
-    combined_embedding = np.mean([embedding1, embedding2], axis=0)
-    return combined_embedding
+    return generate_combined_embeddings([text])[0]
+
+def generate_combined_embeddings(texts, batch_size=None, embedder=None):
+    """
+    Generate combined embeddings for many texts using batched forward passes.
+
+    Texts already in the embedding cache are served from it; only the
+    misses are run through the models.
+
+    Args:
+        texts (List[str]): The input texts to embed.
+        batch_size (int): Number of texts per model forward pass.
+            Defaults to EMBED_BATCH_SIZE.
+        embedder (Embedder): Embedder to use instead of the configured one.
+
+    Returns:
+        np.ndarray: Array of shape (len(texts), dim) with combined embeddings.
+    """
+    embedder = embedder or globals()["embedder"]
+    if not texts:
+        return np.empty((0, embedder.dim), dtype=np.float32)
+
+    batch_size = batch_size or EMBED_BATCH_SIZE
+    if not EMBED_CACHE_ENABLED:
+        return embedder.encode(texts, batch_size)
+
+    model_id = embedder.model_id
+    keys = [embedding_cache.make_key(text, model_id) for text in texts]
+    cached = embedding_cache.get_many(keys)
+
+    # Embed each distinct missing text once
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in cached and key not in missing:
+            missing[key] = text
+    if missing:
+        computed = embedder.encode(list(missing.values()), batch_size)
+        new_items = list(zip(missing.keys(), computed))
+        embedding_cache.put_many(new_items)
+        cached.update(new_items)
+
+    return np.array([cached[key] for key in keys], dtype=np.float32)
 
-def generate_embeddings_for_documents(documents):
+def generate_embeddings_for_documents(documents, batch_size=None):
     """
     Generate embeddings for a list of documents.
 
     Args:
         documents (List[str]): List of document texts.
+        batch_size (int): Number of texts per model forward pass.
 
     Returns:
         np.ndarray: Array of combined embeddings for all documents.
     """
-    return np.array([generate_combined_embedding(doc) for doc in documents])
+    return generate_combined_embeddings(list(documents), batch_size=batch_size)
@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from core.config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.path.join(DATA_DIR, "cache", "embeddings.sqlite")
+
+# Number of vectors kept in the in-memory LRU in front of the on-disk store
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", 10000))
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache.
+
+    Vectors are keyed by a hash of the model identity and the text, held in
+    a bounded in-memory LRU and persisted in a SQLite table on disk.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_items=EMBED_CACHE_SIZE):
+        self.path = path
+        self.max_items = max_items
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._conn = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, dim INTEGER, vector BLOB)"
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache disk store unavailable at {path}: {e}. Using memory only.")
+            self._conn = None
+
+    @staticmethod
+    def make_key(text, model_id):
+        return hashlib.sha256(f"{model_id}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key, vector):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    def get_many(self, keys):
+        """
+        Look up vectors for keys.
+
+        Returns:
+            dict: Mapping of key to vector for every key found.
+        """
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    found[key] = vector
+                else:
+                    missing.append(key)
+
+            if missing and self._conn is not None:
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                        batch,
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32).copy()
+                        self._remember(key, vector)
+                        found[key] = vector
+                        self.disk_hits += 1
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """
+        Store (key, vector) pairs in memory and on disk.
+        """
+        rows = []
+        with self._lock:
+            for key, vector in items:
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, int(vector.shape[0]), vector.tobytes()))
+            if rows and self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, dim, vector) VALUES (?, ?, ?)", rows
+                )
+                self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": EMBED_CACHE_ENABLED,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_items": len(self._lru),
+                "max_items": self.max_items,
+                "persistent": self._conn is not None,
+            }
+
+
+embedding_cache = EmbeddingCache()
@@ -1,11 +1,117 @@
 import pdfminer.high_level
+from pdfminer.layout import LTTextContainer
+from pdfminer.pdfpage import PDFPage
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from collections import deque
 import os
 
-def extract_text(file_path: str, mime_type: str):
+# Plain-text files are streamed in blocks of roughly this many characters
+TEXT_BLOCK_CHARS = int(os.getenv("TEXT_BLOCK_CHARS", 64 * 1024))
+
+# Parallel PDF extraction: worker processes, pages per task, and the page
+# count below which serial extraction is used because process startup
+# costs more than it saves
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", 8))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 32))
+
+def extract_text(file_path: str, mime_type: str, workers=None):
     if mime_type == "application/pdf":
-        return pdfminer.high_level.extract_text(file_path)
+        # Pages are separated by form feeds, as pdfminer's extract_text does
+        return "".join(text + "\f" for _, text in iter_pdf_pages_parallel(file_path, workers=workers))
     elif mime_type == "text/plain":
         with open(file_path, "r", encoding="utf-8") as f:
             return f.read()
     else:
         raise ValueError("Unsupported file type")
+
+def page_separator(mime_type: str):
+    """
+    String between pages in the text returned by extract_text.
+    """
+    return "\f" if mime_type == "application/pdf" else ""
+
+def _page_text(page):
+    return "".join(element.get_text() for element in page if isinstance(element, LTTextContainer))
+
+def count_pdf_pages(file_path: str):
+    with open(file_path, "rb") as f:
+        return sum(1 for _ in PDFPage.get_pages(f))
+
+def _extract_page_range(file_path, start, end):
+    """
+    Extract pages [start, end) (0-based). Runs in a worker process.
+    """
+    # maxpages stops the page-tree walk after the last page of the range
+    pages = pdfminer.high_level.extract_pages(file_path, page_numbers=range(start, end), maxpages=end)
+    return [(start + offset + 1, _page_text(page)) for offset, page in enumerate(pages)]
+
+def iter_pdf_pages_parallel(file_path: str, workers=None, pages_per_task=None):
+    """
+    Extract PDF pages in a process pool, yielding them in page order.
+
+    The PDF is split into ranges of pages_per_task pages. At most
+    2 * workers ranges are in flight, so memory stays bounded when the
+    consumer is slower than extraction. Falls back to serial extraction for
+    small documents or a single worker.
+
+    Yields:
+        Tuple[int, str]: (page_number, text) pairs, page numbers starting at 1.
+    """
+    workers = workers or PDF_EXTRACT_WORKERS
+    pages_per_task = pages_per_task or PDF_PAGES_PER_TASK
+    page_count = count_pdf_pages(file_path)
+
+    if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        for page_number, page in enumerate(pdfminer.high_level.extract_pages(file_path), start=1):
+            yield page_number, _page_text(page)
+        return
+
+    ranges = deque(
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    )
+    # Spawn rather than fork: ingestion runs on worker threads in a process
+    # that also runs torch, and forking a multithreaded process can deadlock
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        in_flight = deque()
+        while ranges or in_flight:
+            while ranges and len(in_flight) < workers * 2:
+                start, end = ranges.popleft()
+                in_flight.append(executor.submit(_extract_page_range, file_path, start, end))
+            # Ranges complete out of order; consume them in submission order
+            for page in in_flight.popleft().result():
+                yield page
+
+def iter_pages(file_path: str, mime_type: str, workers=None):
+    """
+    Extract a document page by page.
+
+    PDFs are extracted with iter_pdf_pages_parallel, so only a bounded
+    number of pages is held in memory. Plain-text files have no pages; they
+    are read in blocks of about TEXT_BLOCK_CHARS split on line boundaries,
+    numbered from 1.
+
+    Yields:
+        Tuple[int, str]: (page_number, text) pairs, page numbers starting at 1.
+    """
+    if mime_type == "application/pdf":
+        yield from iter_pdf_pages_parallel(file_path, workers=workers)
+    elif mime_type == "text/plain":
+        with open(file_path, "r", encoding="utf-8") as f:
+            page_number = 1
+            block = []
+            size = 0
+            for line in f:
+                block.append(line)
+                size += len(line)
+                if size >= TEXT_BLOCK_CHARS:
+                    yield page_number, "".join(block)
+                    page_number += 1
+                    block = []
+                    size = 0
+            if block:
+                yield page_number, "".join(block)
+    else:
+        raise ValueError("Unsupported file type")
@@ -0,0 +1,174 @@
+import os
+import time
+import uuid
+import shutil
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from core.metrics import ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Bounded worker pool for background ingestion so that heavy CPU work
+# (extraction, sentencizing, embedding, upsert) stays off the event loop
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 2))
+# Finished jobs older than this are dropped from the in-memory job table
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", 3600))
+
+executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+class Job:
+    """
+    Tracks status, per-stage progress and timings for one background job.
+    """
+
+    def __init__(self, kind, **metadata):
+        self.job_id = str(uuid.uuid4())
+        self.kind = kind
+        self.metadata = metadata
+        self.status = "queued"
+        self.stages = []
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Record the status and duration of a pipeline stage.
+
+        A stage entered several times (e.g. once per batch) accumulates its
+        duration and call count in a single entry.
+        """
+        with self._lock:
+            entry = next((s for s in self.stages if s["name"] == name), None)
+            if entry is None:
+                entry = {"name": name, "status": "running", "started_at": time.time(), "duration_ms": 0.0, "calls": 0}
+                self.stages.append(entry)
+            entry["status"] = "running"
+        start = time.perf_counter()
+        try:
+            yield entry
+        except Exception:
+            entry["status"] = "failed"
+            raise
+        else:
+            entry["status"] = "completed"
+        finally:
+            with self._lock:
+                entry["duration_ms"] = round(entry["duration_ms"] + (time.perf_counter() - start) * 1000, 2)
+                entry["calls"] += 1
+
+    def update_progress(self, **counters):
+        """
+        Set progress counters such as pages or chunks processed so far.
+        """
+        with self._lock:
+            self.progress.update(counters)
+
+    def to_dict(self):
+        with self._lock:
+            stages = [dict(s) for s in self.stages]
+            progress = dict(self.progress)
+        total_ms = None
+        if self.started_at is not None:
+            end = self.finished_at or time.time()
+            total_ms = round((end - self.started_at) * 1000, 2)
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "stages": stages,
+            "progress": progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "total_ms": total_ms,
+            **self.metadata,
+        }
+
+
+def _remove_paths(paths):
+    for path in paths:
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not remove {path}: {e}")
+
+
+def _run(job, fn, args, kwargs, cleanup):
+    job.status = "running"
+    job.started_at = time.time()
+    try:
+        job.result = fn(job, *args, **kwargs)
+        job.status = "completed"
+    except Exception as e:
+        logger.exception(f"Job {job.job_id} failed")
+        # Failed jobs are counted here only; the pipeline counts the files a
+        # bulk job skips without failing
+        ERRORS.inc("job")
+        job.error = str(e)
+        job.status = "failed"
+    finally:
+        _remove_paths(cleanup)
+        job.finished_at = time.time()
+
+
+def _prune():
+    cutoff = time.time() - JOB_RETENTION_SECONDS
+    for job_id in [j.job_id for j in _jobs.values() if j.finished_at and j.finished_at < cutoff]:
+        _jobs.pop(job_id, None)
+
+
+def submit_job(kind, fn, *args, metadata=None, cleanup=(), **kwargs):
+    """
+    Queue fn(job, *args, **kwargs) on the worker pool.
+
+    Args:
+        kind (str): Job type label, e.g. "ingest".
+        fn (callable): Work function; receives the Job as first argument.
+        metadata (dict): Extra fields reported with the job status.
+        cleanup (List[str]): Files or directories removed once the job
+            finishes, whether it succeeded or not.
+
+    Returns:
+        Job: The queued job.
+    """
+    job = Job(kind, **(metadata or {}))
+    with _jobs_lock:
+        _prune()
+        _jobs[job.job_id] = job
+    executor.submit(_run, job, fn, args, kwargs, list(cleanup))
+    return job
+
+
+def find_active_job(doc_id):
+    """
+    Return a queued or running job that writes the given document, if any.
+    """
+    with _jobs_lock:
+        for job in _jobs.values():
+            if job.status not in ("queued", "running"):
+                continue
+            if job.metadata.get("doc_id") == doc_id or doc_id in job.metadata.get("doc_ids", ()):
+                return job
+    return None
+
+
+def get_job(job_id):
+    with _jobs_lock:
+        return _jobs.get(job_id)
@@ -0,0 +1,226 @@
+import os
+import re
+import math
+import time
+import sqlite3
+import logging
+import threading
+from collections import Counter
+from core.config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+LEXICAL_INDEX_PATH = os.path.join(DATA_DIR, "lexical.sqlite")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Query terms found in more than this fraction of chunks are ignored: their
+# IDF is close to zero, but their postings are the longest to read
+LEXICAL_MAX_DF = float(os.getenv("LEXICAL_MAX_DF", 0.5))
+
+# Dropped from queries only; the index keeps them, so this list can change
+# without re-indexing
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from had has have how i if in into is it its "
+    "me my no not of on or our so than that the their then there these they this to was we were "
+    "what when where which who why will with you your".split()
+)
+
+# Identifiers such as ERR-1234, v2.3.1 or part_no_77 are kept whole and
+# also split into their parts
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+_PART_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        parts = _PART_RE.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over chunk texts, kept next to the vector collection.
+
+    Postings live in SQLite keyed by term, so a query only reads the
+    postings of its own terms.
+    """
+
+    def __init__(self, path=LEXICAL_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                point_id TEXT PRIMARY KEY,
+                doc_id TEXT NOT NULL,
+                date_added REAL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS chunks_doc_id ON chunks (doc_id);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                point_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, point_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_point_id ON postings (point_id);
+            """
+        )
+        self._conn.commit()
+        # Collection statistics are read once here and then kept up to date
+        # by add() and the removals, so neither search nor stats() has to
+        # rescan the tables
+        self._chunk_count, self._total_length = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks"
+        ).fetchone()
+        self._term_count = self._conn.execute(
+            "SELECT COUNT(DISTINCT term) FROM postings"
+        ).fetchone()[0]
+        self.searches = 0
+        self.search_ms = 0.0
+
+    def add(self, entries):
+        """
+        Index chunks.
+
+        Args:
+            entries (List[Tuple[str, str, float, str]]): (point_id, doc_id,
+                date_added, text) for each chunk.
+        """
+        chunks = {}
+        for point_id, doc_id, date_added, text in entries:
+            chunks[str(point_id)] = (doc_id, date_added, Counter(tokenize(text)))
+        chunk_rows = []
+        posting_rows = []
+        for point_id, (doc_id, date_added, counts) in chunks.items():
+            chunk_rows.append((point_id, doc_id, date_added, sum(counts.values())))
+            posting_rows.extend((term, point_id, tf) for term, tf in counts.items())
+        terms = {term for term, _, _ in posting_rows}
+        with self._lock:
+            # Re-indexed chunks lose their old postings first, so terms the
+            # new text no longer contains do not linger
+            self._delete_points(list(chunks))
+            new_terms = sum(1 for term in terms if not self._has_term(term))
+            self._conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", chunk_rows)
+            self._conn.executemany("INSERT INTO postings VALUES (?, ?, ?)", posting_rows)
+            self._conn.commit()
+            self._chunk_count += len(chunk_rows)
+            self._total_length += sum(row[3] for row in chunk_rows)
+            self._term_count += new_terms
+
+    def remove_points(self, point_ids):
+        with self._lock:
+            self._delete_points([str(point_id) for point_id in point_ids])
+            self._conn.commit()
+
+    def remove_document(self, doc_id):
+        with self._lock:
+            point_ids = [
+                row[0] for row in self._conn.execute("SELECT point_id FROM chunks WHERE doc_id = ?", (doc_id,))
+            ]
+            self._delete_points(point_ids)
+            self._conn.commit()
+
+    def _has_term(self, term):
+        return self._conn.execute("SELECT 1 FROM postings WHERE term = ? LIMIT 1", (term,)).fetchone() is not None
+
+    def _delete_points(self, point_ids):
+        """
+        Delete chunks and their postings, adjusting the collection statistics
+        by the rows actually removed. The caller holds the lock and commits.
+        """
+        terms = set()
+        for point_id in point_ids:
+            row = self._conn.execute("SELECT length FROM chunks WHERE point_id = ?", (point_id,)).fetchone()
+            if row is None:
+                continue
+            terms.update(
+                term for (term,) in self._conn.execute("SELECT term FROM postings WHERE point_id = ?", (point_id,))
+            )
+            self._conn.execute("DELETE FROM postings WHERE point_id = ?", (point_id,))
+            self._conn.execute("DELETE FROM chunks WHERE point_id = ?", (point_id,))
+            self._chunk_count -= 1
+            self._total_length -= row[0]
+        self._term_count -= sum(1 for term in terms if not self._has_term(term))
+
+    def is_empty(self):
+        return self._chunk_count == 0
+
+    def search(self, query, limit=20, doc_ids=None, date_from=None, date_to=None):
+        """
+        Rank chunks against the query with BM25.
+
+        Returns:
+            List[Tuple[str, float]]: (point_id, score), best first.
+        """
+        start = time.perf_counter()
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term not in STOPWORDS]
+        if not terms or self._chunk_count == 0:
+            return []
+
+        filters = []
+        filter_params = []
+        if doc_ids:
+            filters.append("c.doc_id IN ({})".format(",".join("?" * len(doc_ids))))
+            filter_params.extend(doc_ids)
+        if date_from is not None:
+            filters.append("c.date_added >= ?")
+            filter_params.append(date_from)
+        if date_to is not None:
+            filters.append("c.date_added <= ?")
+            filter_params.append(date_to)
+
+        with self._lock:
+            n = self._chunk_count
+            avg_length = self._total_length / n if n else 0
+            # Counting postings stays inside SQLite; only the postings of
+            # the remaining terms are loaded into Python
+            df = dict(self._conn.execute(
+                "SELECT term, COUNT(*) FROM postings WHERE term IN ({}) GROUP BY term".format(
+                    ",".join("?" * len(terms))),
+                terms,
+            ).fetchall())
+            max_df = max(1, LEXICAL_MAX_DF * n)
+            terms = [term for term in terms if 0 < df.get(term, 0) <= max_df]
+            rows = []
+            if terms:
+                where = ["p.term IN ({})".format(",".join("?" * len(terms)))] + filters
+                rows = self._conn.execute(
+                    "SELECT p.term, p.point_id, p.tf, c.length FROM postings p "
+                    "JOIN chunks c ON c.point_id = p.point_id WHERE " + " AND ".join(where),
+                    terms + filter_params,
+                ).fetchall()
+
+        scores = {}
+        for term, point_id, tf, length in rows:
+            idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+            norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / (avg_length or 1))
+            scores[point_id] = scores.get(point_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        with self._lock:
+            self.searches += 1
+            self.search_ms += (time.perf_counter() - start) * 1000
+        return ranked
+
+    def stats(self):
+        with self._lock:
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            return {
+                "chunks": self._chunk_count,
+                "terms": self._term_count,
+                "size_bytes": page_count * page_size,
+                "searches": self.searches,
+                "avg_search_ms": round(self.search_ms / self.searches, 3) if self.searches else None,
+            }
+
+
+lexical_index = LexicalIndex()
@@ -1,6 +1,9 @@
 import os
+import re
 import logging
 from importlib.util import find_spec
+from core.context import pack_contexts, record_prompt
+from core.llm_client import llm_client, LLM_BACKEND
 
 try:
     from dotenv import load_dotenv
@@ -11,15 +14,20 @@ except ImportError:
 logger = logging.getLogger(__name__)
 has_genai = find_spec("google.generativeai") is not None
 
-if has_genai:
-    import google.generativeai as genai
-    api_key = os.getenv("GEMINI_API_KEY")
-    if api_key:
-        genai.configure(api_key=api_key)
-else:
-    pass
+def _uses_client():
+    # Only the "gemini" backend needs the SDK installed
+    return LLM_BACKEND != "gemini" or has_genai
 
-def ask_llm(query, contexts):
+def _missing_key():
+    return LLM_BACKEND == "gemini" and not os.getenv("GEMINI_API_KEY")
+
+def build_prompt(query, contexts):
+    """
+    Build the answer prompt, packing contexts into the token budget.
+
+    Contexts should be ordered most relevant first; see pack_contexts.
+    """
+    contexts, pack_stats = pack_contexts(contexts)
     context_text = "\n\n".join(
         [f"Doc {i+1}: {c['text']}" for i, c in enumerate(contexts)]
     )
@@ -31,32 +39,94 @@ def ask_llm(query, contexts):
 Question: {query}
 
 Answer with citations to the documents by referencing Doc numbers."""
+    tokens = record_prompt(prompt)
+    logger.debug(f"Prompt tokens: {tokens} ({pack_stats['chunks_used']} chunks, {pack_stats['chunks_dropped']} dropped)")
+    return prompt
+
+def _mock_response(query, contexts):
+    mock_response = f"This is a mock response since Gemini API is not available.\n\n"
+    mock_response += f"Your question was: {query}\n\n"
+    mock_response += "Based on the documents I found:\n\n"
     
-    if has_genai:
+    for i, context in enumerate(contexts):
+        text = context.get('text', 'No text available')
+        mock_response += f"Doc {i+1}: {text[:100]}{'...' if len(text) > 100 else ''}\n\n"
+        
+    return mock_response
+
+def ask_llm(query, contexts):
+    """
+    Blocking answer for scripts; the API uses ask_llm_async.
+    """
+    prompt = build_prompt(query, contexts)
+
+    if _uses_client():
+        if _missing_key():
+            return "Error: GEMINI_API_KEY environment variable is not set."
         try:
-            api_key = os.getenv("GEMINI_API_KEY")
-            if not api_key:
-                return "Error: GEMINI_API_KEY environment variable is not set."
-            
-            model = genai.GenerativeModel("models/gemini-flash-latest")
-            response = model.generate_content(prompt)
-            
-            if hasattr(response, 'text'):
-                return response.text
-            else:
-                return str(response)
-                
+            return llm_client.generate_sync(prompt)
         except Exception as e:
             logger.error(f"Error: {e}")
             return f"Sorry, I couldn't process your request: {str(e)}"
-    
+
     else:
-        mock_response = f"This is a mock response since Gemini API is not available.\n\n"
-        mock_response += f"Your question was: {query}\n\n"
-        mock_response += "Based on the documents I found:\n\n"
-        
-        for i, context in enumerate(contexts):
-            text = context.get('text', 'No text available')
-            mock_response += f"Doc {i+1}: {text[:100]}{'...' if len(text) > 100 else ''}\n\n"
-            
-        return mock_response
+        return _mock_response(query, contexts)
+
+async def ask_llm_async(query, contexts):
+    """
+    Answer a query without blocking the event loop.
+
+    Goes through the shared LLM client, so concurrency limits, timeouts,
+    retries and coalescing of identical prompts apply.
+
+    Args:
+        query (str): The user question.
+        contexts (List[dict]): Retrieved chunks with a "text" field.
+
+    Returns:
+        str: The answer, or an error message starting with "Error:" or
+        "Sorry, I couldn't process your request".
+    """
+    prompt = build_prompt(query, contexts)
+
+    if _uses_client():
+        if _missing_key():
+            return "Error: GEMINI_API_KEY environment variable is not set."
+        try:
+            return await llm_client.generate(prompt)
+        except Exception as e:
+            logger.error(f"Error: {e!r}")
+            return f"Sorry, I couldn't process your request: {str(e) or type(e).__name__}"
+
+    else:
+        return _mock_response(query, contexts)
+
+async def stream_llm(query, contexts):
+    """
+    Stream the answer to a query as text fragments as they are generated.
+
+    Args:
+        query (str): The user question.
+        contexts (List[dict]): Retrieved chunks with a "text" field.
+
+    Yields:
+        str: Successive fragments of the answer.
+    """
+    prompt = build_prompt(query, contexts)
+
+    if _uses_client():
+        if _missing_key():
+            yield "Error: GEMINI_API_KEY environment variable is not set."
+            return
+
+        try:
+            async for text in llm_client.stream(prompt):
+                yield text
+        except Exception as e:
+            logger.error(f"Error: {e!r}")
+            yield f"Sorry, I couldn't process your request: {str(e) or type(e).__name__}"
+
+    else:
+        # Yield the mock answer word by word so clients see incremental output
+        for token in re.findall(r"\S+\s*", _mock_response(query, contexts)):
+            yield token
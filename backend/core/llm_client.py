@@ -0,0 +1,337 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from importlib.util import find_spec
+from core.metrics import LLM_SECONDS, ERRORS
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+has_genai = find_spec("google.generativeai") is not None
+has_httpx = find_spec("httpx") is not None
+
+if has_genai:
+    import google.generativeai as genai
+
+# "gemini" calls the API through the SDK; "gemini_rest" calls the REST API
+# at LLM_API_BASE directly, so it can be pointed at a local mock server;
+# "fake" is a local backend with simulated latency for offline load tests
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+LLM_MODEL = os.getenv("LLM_MODEL", "models/gemini-flash-latest")
+LLM_API_BASE = os.getenv("LLM_API_BASE", "https://generativelanguage.googleapis.com").rstrip("/")
+# Maximum LLM calls in flight across all requests
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+# Seconds allowed per attempt (per chunk when streaming)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 30))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", 2))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", 0.5))
+LLM_FAKE_LATENCY_MS = float(os.getenv("LLM_FAKE_LATENCY_MS", 200))
+LLM_FAKE_TOKEN_DELAY_MS = float(os.getenv("LLM_FAKE_TOKEN_DELAY_MS", 5))
+
+
+class GeminiBackend:
+    """
+    Gemini backend holding one GenerativeModel for the process.
+    """
+
+    def __init__(self, model_name=LLM_MODEL):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    api_key = os.getenv("GEMINI_API_KEY")
+                    if api_key:
+                        genai.configure(api_key=api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate_sync(self, prompt):
+        response = self.model().generate_content(prompt)
+        return response.text if hasattr(response, "text") else str(response)
+
+    async def generate(self, prompt):
+        response = await self.model().generate_content_async(prompt)
+        return response.text if hasattr(response, "text") else str(response)
+
+    async def stream(self, prompt):
+        response = await self.model().generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            text = getattr(chunk, "text", None)
+            if text:
+                yield text
+
+
+class GeminiRestBackend:
+    """
+    Gemini REST API backend over pooled HTTP connections (requires httpx).
+    """
+
+    def __init__(self, model_name=LLM_MODEL, api_base=LLM_API_BASE, max_connections=LLM_MAX_CONCURRENCY):
+        if not has_httpx:
+            raise RuntimeError("The gemini_rest LLM backend requires httpx: pip install httpx")
+        import httpx
+        self._httpx = httpx
+        self.url = f"{api_base}/v1beta/{model_name}"
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        # httpx async clients are bound to the event loop that uses them
+        self._clients = {}
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            # Per-attempt timeouts are enforced by LLMClient
+            client = self._clients[loop] = self._httpx.AsyncClient(limits=self._limits, timeout=None)
+        return client
+
+    def _params(self, **params):
+        api_key = os.getenv("GEMINI_API_KEY")
+        return {**params, "key": api_key} if api_key else params
+
+    @staticmethod
+    def _body(prompt):
+        return {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+
+    @staticmethod
+    def _text(response):
+        candidates = response.get("candidates") or []
+        if not candidates:
+            return ""
+        return "".join(part.get("text", "") for part in candidates[0].get("content", {}).get("parts", []))
+
+    def generate_sync(self, prompt):
+        response = self._httpx.post(f"{self.url}:generateContent", params=self._params(), json=self._body(prompt), timeout=LLM_TIMEOUT)
+        response.raise_for_status()
+        return self._text(response.json())
+
+    async def generate(self, prompt):
+        response = await self._client().post(f"{self.url}:generateContent", params=self._params(), json=self._body(prompt))
+        response.raise_for_status()
+        return self._text(response.json())
+
+    async def stream(self, prompt):
+        url = f"{self.url}:streamGenerateContent"
+        async with self._client().stream("POST", url, params=self._params(alt="sse"), json=self._body(prompt)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    text = self._text(json.loads(line[5:]))
+                    if text:
+                        yield text
+
+
+class FakeBackend:
+    """
+    Offline backend that answers after a fixed latency, for load tests.
+    """
+
+    def __init__(self, latency_ms=LLM_FAKE_LATENCY_MS, token_delay_ms=LLM_FAKE_TOKEN_DELAY_MS):
+        self.latency_ms = latency_ms
+        self.token_delay_ms = token_delay_ms
+
+    def _answer(self, prompt):
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        docs = len(re.findall(r"^Doc \d+:", prompt, flags=re.MULTILINE))
+        return f"Fake answer {digest} based on {docs} documents [Doc 1]."
+
+    def generate_sync(self, prompt):
+        time.sleep(self.latency_ms / 1000)
+        return self._answer(prompt)
+
+    async def generate(self, prompt):
+        await asyncio.sleep(self.latency_ms / 1000)
+        return self._answer(prompt)
+
+    async def stream(self, prompt):
+        await asyncio.sleep(self.latency_ms / 1000)
+        for token in re.findall(r"\S+\s*", self._answer(prompt)):
+            await asyncio.sleep(self.token_delay_ms / 1000)
+            yield token
+
+
+BACKENDS = {
+    "gemini": GeminiBackend,
+    "gemini_rest": GeminiRestBackend,
+    "fake": FakeBackend,
+}
+
+
+class LLMClient:
+    """
+    Shared async LLM client.
+
+    Calls go through one semaphore sized LLM_MAX_CONCURRENCY, each attempt
+    is bounded by a timeout, failures are retried with exponential backoff
+    and full jitter, and identical prompts already in flight share one call.
+    """
+
+    def __init__(self, backend, max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT,
+                 retries=LLM_RETRIES, retry_base_delay=LLM_RETRY_BASE_DELAY):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_base_delay = retry_base_delay
+        self._semaphores = {}
+        self._inflight = {}
+        self._stats = {"calls": 0, "coalesced": 0, "retries": 0, "timeouts": 0,
+                       "errors": 0, "in_flight": 0, "total_ms": 0.0}
+
+    def _semaphore(self):
+        # One semaphore per event loop; normally the app has a single loop
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    def _backoff(self, attempt):
+        return random.uniform(0, self.retry_base_delay * (2 ** attempt))
+
+    async def _call(self, prompt):
+        start = time.perf_counter()
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    async with self._semaphore():
+                        self._stats["in_flight"] += 1
+                        try:
+                            return await asyncio.wait_for(self.backend.generate(prompt), self.timeout)
+                        finally:
+                            self._stats["in_flight"] -= 1
+                except asyncio.TimeoutError:
+                    self._stats["timeouts"] += 1
+                    if attempt == self.retries:
+                        raise
+                    logger.warning(f"LLM call timed out after {self.timeout}s; retrying")
+                except Exception as e:
+                    if attempt == self.retries:
+                        raise
+                    logger.warning(f"LLM call failed: {e}; retrying")
+                self._stats["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt))
+        except Exception:
+            self._stats["errors"] += 1
+            ERRORS.inc("llm")
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stats["calls"] += 1
+            self._stats["total_ms"] += elapsed * 1000
+            LLM_SECONDS.observe(elapsed, "generate")
+
+    async def generate(self, prompt):
+        """
+        Generate a completion, sharing the call with identical in-flight prompts.
+
+        Args:
+            prompt (str): The full prompt.
+
+        Returns:
+            str: The generated text.
+        """
+        key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._call(prompt))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one caller disconnecting doesn't cancel the shared call
+        return await asyncio.shield(task)
+
+    async def stream(self, prompt):
+        """
+        Stream a completion as text fragments.
+
+        Streams are not coalesced, and only a failure before the first
+        fragment is retried.
+
+        Yields:
+            str: Successive fragments of the answer.
+        """
+        start = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            started = False
+            try:
+                async with self._semaphore():
+                    self._stats["in_flight"] += 1
+                    try:
+                        fragments = self.backend.stream(prompt).__aiter__()
+                        while True:
+                            try:
+                                text = await asyncio.wait_for(fragments.__anext__(), self.timeout)
+                            except StopAsyncIteration:
+                                LLM_SECONDS.observe(time.perf_counter() - start, "stream")
+                                return
+                            started = True
+                            yield text
+                    finally:
+                        self._stats["in_flight"] -= 1
+                        self._stats["calls"] += 1
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self._stats["timeouts"] += 1
+                if started or attempt == self.retries:
+                    self._stats["errors"] += 1
+                    ERRORS.inc("llm")
+                    raise
+                logger.warning(f"LLM stream failed: {e!r}; retrying")
+            self._stats["retries"] += 1
+            await asyncio.sleep(self._backoff(attempt))
+
+    def generate_sync(self, prompt):
+        """
+        Blocking single call for scripts outside the event loop.
+        """
+        with LLM_SECONDS.time("sync"):
+            return self.backend.generate_sync(prompt)
+
+    def stats(self):
+        calls = self._stats["calls"]
+        return {
+            "backend": type(self.backend).__name__,
+            "max_concurrency": self.max_concurrency,
+            "timeout_s": self.timeout,
+            "calls": calls,
+            "coalesced": self._stats["coalesced"],
+            "retries": self._stats["retries"],
+            "timeouts": self._stats["timeouts"],
+            "errors": self._stats["errors"],
+            "in_flight": self._stats["in_flight"],
+            "avg_ms": round(self._stats["total_ms"] / calls, 3) if calls else None,
+        }
+
+
+def create_llm_client(backend=None, **kwargs):
+    """
+    Build an LLMClient for the named backend.
+
+    Args:
+        backend (str): Key in BACKENDS; defaults to LLM_BACKEND.
+
+    Returns:
+        LLMClient: The client.
+    """
+    name = (backend or LLM_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return LLMClient(BACKENDS[name](), **kwargs)
+
+
+llm_client = create_llm_client()
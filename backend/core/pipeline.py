@@ -0,0 +1,418 @@
+import os
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+
+from core.extractor import iter_pages, page_separator
+from core.chunker import iter_chunks, nearest_neighbors
+from core.embedder import generate_combined_embeddings
+from core.vector_store import (
+    insert_vectors, delete_document, get_document_points, get_document_vectors, update_payloads,
+    delete_points, chunk_hash,
+)
+from core.catalog import catalog
+from core.metrics import INGEST_STAGE_SECONDS, CHUNKS_INGESTED, ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Chunks embedded and upserted together; bounds memory held per document
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 64))
+# Semantically nearest chunks linked from each chunk's payload
+CHUNK_NEIGHBORS = int(os.getenv("CHUNK_NEIGHBORS", 2))
+
+
+# Seconds spent per stage name by the current thread, so chunking can be
+# timed apart from the page extraction it pulls in
+_thread_stage_seconds = threading.local()
+
+
+@contextmanager
+def _stage(job, name):
+    totals = _thread_stage_seconds.__dict__
+    extract_before = totals.get("extract", 0.0)
+    start = time.perf_counter()
+    try:
+        with job.stage(name) if job is not None else nullcontext():
+            yield
+    finally:
+        elapsed = time.perf_counter() - start
+        totals[name] = totals.get(name, 0.0) + elapsed
+        if name == "extract_chunk":
+            INGEST_STAGE_SECONDS.observe(elapsed - (totals.get("extract", 0.0) - extract_before), "chunk")
+        else:
+            INGEST_STAGE_SECONDS.observe(elapsed, name)
+
+
+def _timed_iter(job, name, iterable):
+    """
+    Wrap an iterator so the time spent producing each item is recorded
+    under the given stage.
+    """
+    iterator = iter(iterable)
+    while True:
+        with _stage(job, name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def _chunk_metadata(chunk):
+    metadata = {
+        "page_start": chunk["page_start"],
+        "page_end": chunk["page_end"],
+        "char_start": chunk["char_start"],
+        "char_end": chunk["char_end"],
+    }
+    # Chunks re-embedded during an update keep their position in the new version
+    if "chunk_idx" in chunk:
+        metadata["chunk_idx"] = chunk["chunk_idx"]
+    return metadata
+
+
+def link_document_chunks(job, doc_id):
+    """
+    Store neighbor links on every chunk of a document.
+
+    Each chunk gets adjacent_ids (the previous and next chunk) and
+    neighbor_ids (the CHUNK_NEIGHBORS most similar chunks of the same
+    document), so query-time context expansion can fetch them by id.
+    Vectors are read back from the collection rather than kept in memory
+    during ingestion.
+    """
+    with _stage(job, "link"):
+        point_ids, vectors = get_document_vectors(doc_id)
+        if not point_ids:
+            return 0
+        neighbors = nearest_neighbors(vectors, k=CHUNK_NEIGHBORS)
+        updates = []
+        for i, point_id in enumerate(point_ids):
+            adjacent = [point_ids[j] for j in (i - 1, i + 1) if 0 <= j < len(point_ids)]
+            updates.append((point_id, {
+                "adjacent_ids": adjacent,
+                "neighbor_ids": [point_ids[j] for j in neighbors[i] if j >= 0],
+            }))
+        update_payloads(updates)
+    return len(updates)
+
+
+class ChunkBatcher:
+    """
+    Accumulates chunks, possibly from several documents, and embeds and
+    upserts them in batches of batch_size.
+
+    A batch may span document boundaries; on flush its chunks are upserted
+    grouped by document, continuing each document's chunk_idx sequence.
+    """
+
+    def __init__(self, job=None, batch_size=None):
+        self.job = job
+        self.batch_size = batch_size or INGEST_BATCH_SIZE
+        self.counts = {}
+        # Ids of every point upserted so far, so callers can roll back
+        self.point_ids = []
+        self._batch = []
+
+    def add(self, doc_id, chunk):
+        self._batch.append((doc_id, chunk))
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        # Semantic chunks arrive with embeddings derived from their sentences
+        pending = [chunk for _, chunk in batch if "embedding" not in chunk]
+        if pending:
+            with _stage(self.job, "embed"):
+                embedded = iter(generate_combined_embeddings([chunk["text"] for chunk in pending]))
+        batch_embeddings = [chunk["embedding"] if "embedding" in chunk else next(embedded) for _, chunk in batch]
+
+        grouped = {}
+        for (doc_id, chunk), embedding in zip(batch, batch_embeddings):
+            grouped.setdefault(doc_id, []).append((chunk, embedding))
+
+        with _stage(self.job, "upsert"):
+            for doc_id, items in grouped.items():
+                start_idx = self.counts.get(doc_id, 0)
+                self.point_ids.extend(insert_vectors(
+                    [chunk["text"] for chunk, _ in items],
+                    [embedding for _, embedding in items],
+                    doc_id,
+                    start_idx=start_idx,
+                    metadata=[_chunk_metadata(c) for c, _ in items],
+                ))
+                self.counts[doc_id] = start_idx + len(items)
+        CHUNKS_INGESTED.inc(amount=len(batch))
+
+        if self.job is not None:
+            self.job.update_progress(chunks=sum(self.counts.values()))
+
+
+def ingest_document(job, file_path, content_type, doc_id, filename):
+    """
+    Run the full ingestion pipeline for one stored file.
+
+    Pages are extracted, sentence-split and chunked incrementally; chunks
+    are embedded and upserted in batches of INGEST_BATCH_SIZE as they
+    arrive, so peak memory does not grow with document length.
+
+    Args:
+        job (Job): Job used to record per-stage progress, or None.
+        file_path (str): Path of the uploaded file on disk.
+        content_type (str): MIME type of the file.
+        doc_id (str): Document ID to store the chunks under.
+        filename (str): Original filename of the upload.
+
+    Returns:
+        dict: Summary of the processed document.
+    """
+    catalog.register(doc_id, filename=filename, content_type=content_type, byte_size=os.path.getsize(file_path))
+    try:
+        return _ingest_document(job, file_path, content_type, doc_id, filename)
+    except Exception:
+        # Drop partial chunks and the catalog entry, so the content hash
+        # doesn't point later uploads at a broken document
+        delete_document(doc_id)
+        catalog.remove(doc_id)
+        raise
+
+
+def _ingest_document(job, file_path, content_type, doc_id, filename):
+    pages_seen = 0
+
+    def pages():
+        nonlocal pages_seen
+        for page_number, text in _timed_iter(job, "extract", iter_pages(file_path, content_type)):
+            pages_seen = page_number
+            if job is not None:
+                job.update_progress(pages=pages_seen)
+            yield page_number, text
+
+    batcher = ChunkBatcher(job)
+    # Pulling a chunk may extract further pages, so "extract_chunk" includes
+    # the time also reported under "extract" (and, with semantic chunking,
+    # the time spent embedding sentences)
+    for chunk in _timed_iter(job, "extract_chunk", iter_chunks(pages(), separator=page_separator(content_type))):
+        batcher.add(doc_id, chunk)
+    batcher.flush()
+    chunk_count = batcher.counts.get(doc_id, 0)
+
+    link_document_chunks(job, doc_id)
+
+    logger.info(f"Ingested {filename} as {doc_id}: {pages_seen} pages, {chunk_count} chunks")
+    return {
+        "doc_id": doc_id,
+        "filename": filename,
+        "pages": pages_seen,
+        "chunks": chunk_count,
+        "content_type": content_type,
+    }
+
+
+_DOC_DONE = object()
+
+
+def ingest_many(job, files):
+    """
+    Ingest many stored files as one pipelined job.
+
+    A producer thread extracts and chunks documents one after another into
+    a bounded queue while this thread embeds and upserts batches that span
+    document boundaries, so extraction of the next file overlaps embedding
+    of the previous one.
+
+    Args:
+        job (Job): Job used to record per-stage progress, or None.
+        files (List[dict]): Entries with file_path, content_type, doc_id
+            and filename.
+
+    Returns:
+        dict: Per-file manifest with doc_id, status, chunks and any error.
+    """
+    try:
+        return _ingest_many(job, files)
+    except Exception:
+        # Embedding, upsert or linking failed for the whole job: drop every
+        # document's partial chunks and catalog entry, as ingest_document does
+        for entry in files:
+            delete_document(entry["doc_id"])
+            catalog.remove(entry["doc_id"])
+        raise
+
+
+def _ingest_many(job, files):
+    work = queue.Queue(maxsize=INGEST_BATCH_SIZE * 4)
+    errors = {}
+    stop = threading.Event()
+
+    def put(item):
+        # Give up if the consumer has failed, instead of blocking forever
+        while not stop.is_set():
+            try:
+                work.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise RuntimeError("Bulk ingestion aborted")
+
+    def produce():
+        for entry in files:
+            doc_id = entry["doc_id"]
+            try:
+                catalog.register(
+                    doc_id,
+                    filename=entry["filename"],
+                    content_type=entry["content_type"],
+                    byte_size=os.path.getsize(entry["file_path"]),
+                )
+                pages = _timed_iter(job, "extract", iter_pages(entry["file_path"], entry["content_type"]))
+                chunks = iter_chunks(pages, separator=page_separator(entry["content_type"]))
+                for chunk in _timed_iter(job, "extract_chunk", chunks):
+                    put((doc_id, chunk))
+            except Exception as e:
+                if stop.is_set():
+                    return
+                logger.warning(f"Failed to ingest {entry['filename']}: {e}")
+                ERRORS.inc("ingest")
+                errors[doc_id] = str(e)
+            try:
+                put((doc_id, _DOC_DONE))
+            except RuntimeError:
+                return
+        try:
+            put(None)
+        except RuntimeError:
+            return
+
+    producer = threading.Thread(target=produce, name="bulk-extract", daemon=True)
+    producer.start()
+
+    batcher = ChunkBatcher(job)
+    documents_done = 0
+    try:
+        while True:
+            item = work.get()
+            if item is None:
+                break
+            doc_id, chunk = item
+            if chunk is _DOC_DONE:
+                documents_done += 1
+                if job is not None:
+                    job.update_progress(documents=documents_done, total_documents=len(files))
+                continue
+            batcher.add(doc_id, chunk)
+        batcher.flush()
+    finally:
+        stop.set()
+        producer.join()
+
+    manifest = []
+    for entry in files:
+        doc_id = entry["doc_id"]
+        if doc_id in errors:
+            # Drop any chunks of a partially processed document
+            delete_document(doc_id)
+            catalog.remove(doc_id)
+            status = "failed"
+        else:
+            link_document_chunks(job, doc_id)
+            status = "completed"
+        manifest.append({
+            "filename": entry["filename"],
+            "doc_id": doc_id if status == "completed" else None,
+            "status": status,
+            "chunks": batcher.counts.get(doc_id, 0) if status == "completed" else 0,
+            "content_type": entry["content_type"],
+            "error": errors.get(doc_id),
+        })
+
+    logger.info(f"Bulk ingested {len(files) - len(errors)}/{len(files)} files, {sum(batcher.counts.values())} chunks")
+    return {"files": manifest, "chunks": sum(batcher.counts.values())}
+
+
+def update_document(job, file_path, content_type, doc_id, filename, content_hash=None):
+    """
+    Re-ingest a new version of an existing document incrementally.
+
+    The new version is chunked and each chunk hashed. Chunks whose text
+    matches an existing point keep that point and its vector; only their
+    position and page payload is updated. Changed chunks are embedded and
+    upserted, and points no longer present are deleted.
+
+    Args:
+        job (Job): Job used to record per-stage progress, or None.
+        file_path (str): Path of the new version on disk.
+        content_type (str): MIME type of the file.
+        doc_id (str): Existing document to update.
+        filename (str): Original filename of the new version.
+        content_hash (str): Hash of the new file, recorded once done.
+
+    Returns:
+        dict: Counts of reused, embedded and deleted chunks.
+    """
+    with _stage(job, "load_existing"):
+        # Hash -> ids of existing points with that text, in chunk order
+        existing = {}
+        points = sorted(get_document_points(doc_id), key=lambda p: p[1].get("chunk_idx", 0))
+        payloads = dict(points)
+        for point_id, payload in points:
+            digest = payload.get("chunk_hash") or chunk_hash(payload.get("text", ""))
+            existing.setdefault(digest, []).append(point_id)
+
+    pages = _timed_iter(job, "extract", iter_pages(file_path, content_type))
+    batcher = ChunkBatcher(job)
+    reused = []
+    chunk_idx = 0
+    try:
+        for chunk in _timed_iter(job, "extract_chunk", iter_chunks(pages, separator=page_separator(content_type))):
+            ids = existing.get(chunk_hash(chunk["text"]))
+            if ids:
+                reused.append((ids.pop(0), {"chunk_idx": chunk_idx, **_chunk_metadata(chunk)}))
+            else:
+                batcher.add(doc_id, {**chunk, "chunk_idx": chunk_idx})
+            chunk_idx += 1
+        batcher.flush()
+
+        with _stage(job, "upsert"):
+            update_payloads(reused)
+    except Exception:
+        # Until stale points are deleted the old version is intact: drop the
+        # new points and restore the positions of the reused ones
+        delete_points(doc_id, batcher.point_ids)
+        update_payloads([
+            (point_id, {key: payloads[point_id][key] for key in fields if key in payloads[point_id]})
+            for point_id, fields in reused
+        ])
+        raise
+
+    with _stage(job, "upsert"):
+        stale = [point_id for ids in existing.values() for point_id in ids]
+        delete_points(doc_id, stale)
+
+    catalog.register(
+        doc_id,
+        filename=filename,
+        content_type=content_type,
+        byte_size=os.path.getsize(file_path),
+        content_hash=content_hash,
+    )
+
+    # Positions and content changed, so links are recomputed for the document
+    link_document_chunks(job, doc_id)
+
+    embedded = batcher.counts.get(doc_id, 0)
+    logger.info(f"Updated {doc_id}: {len(reused)} chunks reused, {embedded} embedded, {len(stale)} deleted")
+    return {
+        "doc_id": doc_id,
+        "filename": filename,
+        "chunks": chunk_idx,
+        "reused": len(reused),
+        "embedded": embedded,
+        "deleted": len(stale),
+        "content_type": content_type,
+    }
@@ -0,0 +1,145 @@
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Load every registered model at startup instead of on first use
+WARMUP_MODELS = os.getenv("WARMUP_MODELS", "true").lower() in ("1", "true", "yes")
+
+
+def _rss_bytes():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class ModelRegistry:
+    """
+    Process-wide registry that loads each model once, on first use or at warmup.
+
+    Records the load time and approximate resident memory added by each model.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._info = {}
+        self._locks = {}
+        self._warmup_names = []
+        self._lock = threading.Lock()
+        self.warmup_started = False
+        self.warmup_error = None
+
+    def register(self, name, loader, warmup=True):
+        """
+        Register a loader. Models with warmup=False are only loaded on first
+        use and do not gate readiness.
+        """
+        with self._lock:
+            self._loaders[name] = loader
+            if warmup:
+                self._warmup_names.append(name)
+            self._locks.setdefault(name, threading.Lock())
+            self._info.setdefault(name, {"loaded": False, "load_seconds": None, "memory_bytes": None})
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        if name not in self._loaders:
+            raise KeyError(f"Model {name} is not registered")
+
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+            logger.info(f"Loading model {name}...")
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            model = self._loaders[name]()
+            load_seconds = time.perf_counter() - start
+            rss_after = _rss_bytes()
+            self._models[name] = model
+            self._info[name] = {
+                "loaded": True,
+                "load_seconds": round(load_seconds, 3),
+                "memory_bytes": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+            }
+            logger.info(f"Loaded model {name} in {load_seconds:.2f}s")
+            return model
+
+    def warmup(self, names=None):
+        """
+        Load the given models (all warmup models by default).
+        """
+        self.warmup_started = True
+        try:
+            for name in names or list(self._warmup_names):
+                self.get(name)
+        except Exception as e:
+            logger.exception("Model warmup failed")
+            self.warmup_error = str(e)
+            raise
+
+    def is_ready(self):
+        # Without warmup, models load on first use and never gate readiness;
+        # an instance that only answers queries may never need some of them
+        if not WARMUP_MODELS:
+            return True
+        return all(self._info[name]["loaded"] for name in self._warmup_names)
+
+    def status(self):
+        return {
+            "ready": self.is_ready(),
+            "lazy_loading": not WARMUP_MODELS,
+            "warmup_started": self.warmup_started,
+            "warmup_error": self.warmup_error,
+            "models": {name: dict(info) for name, info in self._info.items()},
+        }
+
+
+registry = ModelRegistry()
+
+
+def _load_sentence_transformer(model_name, quantized=False):
+    def loader():
+        from sentence_transformers import SentenceTransformer
+        if not quantized:
+            return SentenceTransformer(model_name)
+        # Dynamic int8 quantization of the Linear layers for CPU inference
+        import torch
+        model = SentenceTransformer(model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return loader
+
+
+def register_sentence_transformer(model_name, quantized=False, warmup=True):
+    """
+    Register a SentenceTransformer model, optionally int8-quantized.
+
+    Returns:
+        str: The registry name of the model.
+    """
+    name = f"{model_name}:int8" if quantized else model_name
+    if name not in registry._loaders:
+        registry.register(name, _load_sentence_transformer(model_name, quantized), warmup=warmup)
+    return name
+
+
+def _load_sentencizer():
+    from spacy.lang.en import English
+    nlp = English()
+    nlp.add_pipe("sentencizer")
+    return nlp
+
+
+registry.register("sentencizer", _load_sentencizer)
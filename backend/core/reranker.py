@@ -0,0 +1,99 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from core.registry import registry
+
+logger = logging.getLogger(__name__)
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() in ("1", "true", "yes")
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# Candidates retrieved for reranking, and chunks kept for the prompt
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 50))
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", 3))
+# Past this budget the candidates are returned in retrieval order
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", 300))
+
+
+def _load_cross_encoder():
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(RERANK_MODEL)
+
+
+registry.register("reranker", _load_cross_encoder, warmup=RERANK_ENABLED)
+
+RERANK_WORKERS = 2
+_pool = ThreadPoolExecutor(max_workers=RERANK_WORKERS, thread_name_prefix="rerank")
+# Scoring that timed out keeps running on its worker. New work is only
+# submitted while a worker is free, so requests never queue behind
+# abandoned scoring and time out in turn.
+_free_workers = threading.BoundedSemaphore(RERANK_WORKERS)
+_stats = {"calls": 0, "fallbacks": 0, "busy": 0, "total_ms": 0.0}
+
+
+def _score(query, texts):
+    model = registry.get("reranker")
+    # All pairs go through the model in a single batch
+    return model.predict([(query, text) for text in texts], batch_size=len(texts))
+
+
+def rerank(query, candidates, top_k=None, budget_ms=None):
+    """
+    Reorder retrieved chunks by cross-encoder relevance to the query.
+
+    Args:
+        query (str): The user question.
+        candidates (List[dict]): Retrieved payloads with a "text" field, in
+            retrieval order.
+        top_k (int): Number of chunks to return.
+        budget_ms (float): Latency budget for scoring. If exceeded, or if
+            every worker is still busy with earlier scoring, the first
+            top_k candidates are returned in retrieval order.
+
+    Returns:
+        List[dict]: The top_k most relevant payloads.
+    """
+    top_k = top_k or RERANK_TOP_K
+    budget_ms = RERANK_BUDGET_MS if budget_ms is None else budget_ms
+    if len(candidates) <= 1:
+        return candidates[:top_k]
+
+    if not _free_workers.acquire(blocking=False):
+        logger.warning("Reranker busy; using retrieval order")
+        _stats["busy"] += 1
+        _stats["fallbacks"] += 1
+        return candidates[:top_k]
+
+    start = time.perf_counter()
+    future = _pool.submit(_score, query, [c.get("text", "") for c in candidates])
+    future.add_done_callback(lambda _: _free_workers.release())
+    try:
+        scores = future.result(timeout=budget_ms / 1000)
+    except TimeoutError:
+        logger.warning(f"Reranking exceeded {budget_ms}ms budget; using retrieval order")
+        _stats["fallbacks"] += 1
+        return candidates[:top_k]
+    except Exception as e:
+        logger.error(f"Reranking failed: {e}; using retrieval order")
+        _stats["fallbacks"] += 1
+        return candidates[:top_k]
+    finally:
+        _stats["calls"] += 1
+        _stats["total_ms"] += (time.perf_counter() - start) * 1000
+
+    order = sorted(range(len(candidates)), key=lambda i: float(scores[i]), reverse=True)
+    return [candidates[i] for i in order[:top_k]]
+
+
+def rerank_stats():
+    calls = _stats["calls"]
+    return {
+        "enabled": RERANK_ENABLED,
+        "model": RERANK_MODEL,
+        "calls": calls,
+        "fallbacks": _stats["fallbacks"],
+        "busy": _stats["busy"],
+        "avg_ms": round(_stats["total_ms"] / calls, 3) if calls else None,
+    }
@@ -1,139 +1,608 @@
 from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue, FilterSelector
+from qdrant_client.local.qdrant_local import QdrantLocal
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import (
+    VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue, MatchAny,
+    FilterSelector, PointIdsList, Range, PayloadSchemaType, SetPayload, SetPayloadOperation,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, BinaryQuantization,
+    BinaryQuantizationConfig, Disabled, SearchParams, QuantizationSearchParams,
+)
 import uuid
+import time
+import numpy as np
+import hashlib
 import logging
 import os
+import threading
+from core.config import DATA_DIR
+from core.catalog import catalog
+from core.embedder import EMBEDDING_DIM
+from core.lexical_index import lexical_index
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
 # Use persistent storage in data directory instead of in-memory
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 
-# Try to connect to local storage, fall back to in-memory if local storage is locked
-try:
-    client = QdrantClient(path=DATA_DIR)
-    logger.info(f"Successfully connected to persistent storage at {DATA_DIR}")
-except RuntimeError as e:
-    if "already accessed by another instance" in str(e):
-        logger.warning(f"Storage folder {DATA_DIR} is locked. Falling back to in-memory storage.")
-        client = QdrantClient(":memory:")
-    else:
-        raise
+class _SerializedClient:
+    """
+    Runs every call on the wrapped client under one lock.
+
+    The local Qdrant client keeps its points in plain numpy arrays, so a
+    search running while an ingest thread upserts can see arrays of
+    different lengths and fail.
+    """
+
+    def __init__(self, client):
+        self._wrapped = client
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._wrapped, name)
+        if not callable(attr):
+            return attr
+
+        def locked(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return locked
+
+# Qdrant server to use instead of the embedded storage, e.g.
+# http://localhost:6333. Payload indexes and quantization only take effect
+# on a server; QDRANT_API_KEY is needed for Qdrant Cloud
+QDRANT_URL = os.getenv("QDRANT_URL")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+
+if QDRANT_URL:
+    # The remote client is safe to share between threads
+    client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+    logger.info(f"Connected to Qdrant server at {QDRANT_URL}")
+else:
+    # Try to connect to local storage, fall back to in-memory if local storage is locked
+    try:
+        client = _SerializedClient(QdrantClient(path=DATA_DIR))
+        logger.info(f"Successfully connected to persistent storage at {DATA_DIR}")
+    except RuntimeError as e:
+        if "already accessed by another instance" in str(e):
+            logger.warning(f"Storage folder {DATA_DIR} is locked. Falling back to in-memory storage.")
+            client = _SerializedClient(QdrantClient(":memory:"))
+        else:
+            raise
 COLLECTION_NAME = "documents"
 
+def _is_missing_collection(exc):
+    # The local client raises ValueError; a Qdrant server answers 404
+    if isinstance(exc, UnexpectedResponse):
+        return exc.status_code == 404
+    return f"Collection {COLLECTION_NAME} not found" in str(exc)
+
+# Bumped on every change to the stored corpus so that cached answers
+# computed against an older corpus are never reused
+_corpus_version = 0
+_corpus_version_lock = threading.Lock()
+
+def get_corpus_version():
+    return _corpus_version
+
+def _bump_corpus_version():
+    global _corpus_version
+    with _corpus_version_lock:
+        _corpus_version += 1
+
+def is_local_client():
+    """
+    Whether Qdrant runs embedded in this process rather than as a server.
+    """
+    return isinstance(client._client, QdrantLocal)
+
+# Payload fields used in search filters; indexed so that scoped searches
+# don't scan the whole collection. Only a Qdrant server builds payload
+# indexes; local mode always scans and ignores them.
+PAYLOAD_INDEXES = {
+    "doc_id": PayloadSchemaType.KEYWORD,
+    "date_added": PayloadSchemaType.FLOAT,
+}
+
+# Vector quantization: "none", "scalar" (int8) or "binary". Quantized
+# vectors are searched first, then the oversampled candidates are rescored
+# against the original float32 vectors
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+QUANTIZATION_OVERSAMPLING = float(os.getenv("QUANTIZATION_OVERSAMPLING", 2.0))
+
+def quantization_config(mode=None):
+    mode = mode or VECTOR_QUANTIZATION
+    if mode == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if mode == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    if mode == "none":
+        return None
+    raise ValueError(f"Unknown VECTOR_QUANTIZATION mode: {mode}")
+
+def _search_params():
+    if VECTOR_QUANTIZATION == "none":
+        return None
+    return SearchParams(
+        quantization=QuantizationSearchParams(rescore=True, oversampling=QUANTIZATION_OVERSAMPLING)
+    )
+
 def init_collection():
     client.recreate_collection(
         collection_name=COLLECTION_NAME,
-        vectors_config=VectorParams(size=384, distance=Distance.COSINE),
+        vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE),
+        quantization_config=quantization_config(),
     )
+    ensure_payload_indexes()
+
+_collection_lock = threading.Lock()
+
+def _create_missing_collection():
+    # Concurrent first ingests (or an ingest and a query) on an empty store
+    # would otherwise each recreate the collection and drop the other's points
+    with _collection_lock:
+        try:
+            client.get_collection(COLLECTION_NAME)
+        except (ValueError, UnexpectedResponse) as exc:
+            if not _is_missing_collection(exc):
+                raise
+            init_collection()
+
+def check_vector_size():
+    """
+    Warn when the collection was created for a different embedding dimension,
+    e.g. after changing EMBEDDING_STRATEGY. Existing data is never dropped
+    automatically; re-create the collection and re-ingest instead.
+    """
+    try:
+        size = client.get_collection(COLLECTION_NAME).config.params.vectors.size
+    except (ValueError, UnexpectedResponse) as exc:
+        if _is_missing_collection(exc):
+            return True
+        raise
+    if size != EMBEDDING_DIM:
+        logger.error(
+            f"Collection {COLLECTION_NAME} stores {size}-dim vectors but the configured "
+            f"embedder produces {EMBEDDING_DIM}-dim vectors. Re-create the collection and re-ingest."
+        )
+        return False
+    return True
+
+def ensure_quantization():
+    """
+    Apply the configured quantization mode to an existing collection.
+    """
+    try:
+        current = client.get_collection(COLLECTION_NAME).config.quantization_config
+    except (ValueError, UnexpectedResponse) as exc:
+        if _is_missing_collection(exc):
+            return
+        raise
+    wanted = quantization_config()
+    if wanted is None and current is not None:
+        client.update_collection(collection_name=COLLECTION_NAME, quantization_config=Disabled.DISABLED)
+        logger.info(f"Disabled quantization on {COLLECTION_NAME}")
+    elif wanted is not None and type(current) is not type(wanted):
+        client.update_collection(collection_name=COLLECTION_NAME, quantization_config=wanted)
+        logger.info(f"Enabled {VECTOR_QUANTIZATION} quantization on {COLLECTION_NAME}")
+
+def ensure_payload_indexes():
+    """
+    Create the payload indexes on the collection if they are missing.
+    """
+    if is_local_client():
+        return
+    try:
+        existing = client.get_collection(COLLECTION_NAME).payload_schema or {}
+    except (ValueError, UnexpectedResponse) as exc:
+        if _is_missing_collection(exc):
+            return
+        raise
+    for field, schema in PAYLOAD_INDEXES.items():
+        if field not in existing:
+            client.create_payload_index(
+                collection_name=COLLECTION_NAME,
+                field_name=field,
+                field_schema=schema,
+            )
+
+def build_filter(doc_id=None, doc_ids=None, date_from=None, date_to=None):
+    """
+    Build a search filter restricting results to documents and a date range.
+
+    Args:
+        doc_id (str): Single document to search.
+        doc_ids (List[str]): Documents to search; combined with doc_id.
+        date_from (float): Earliest date_added, as a Unix timestamp.
+        date_to (float): Latest date_added, as a Unix timestamp.
+
+    Returns:
+        Filter: The filter, or None when unrestricted.
+    """
+    conditions = []
+    ids = list(doc_ids or [])
+    if doc_id:
+        ids.append(doc_id)
+    if len(ids) == 1:
+        conditions.append(FieldCondition(key="doc_id", match=MatchValue(value=ids[0])))
+    elif ids:
+        conditions.append(FieldCondition(key="doc_id", match=MatchAny(any=ids)))
+    if date_from is not None or date_to is not None:
+        conditions.append(FieldCondition(key="date_added", range=Range(gte=date_from, lte=date_to)))
+    return Filter(must=conditions) if conditions else None
 
-def insert_vectors(chunks, embeddings, doc_id):
+def chunk_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def insert_vectors(chunks, embeddings, doc_id, start_idx=0, metadata=None):
+    """
+    Upsert chunk vectors for a document.
+
+    Args:
+        chunks (List[str]): Chunk texts.
+        embeddings (List[np.ndarray]): One vector per chunk.
+        doc_id (str): Document the chunks belong to.
+        start_idx (int): chunk_idx of the first chunk, for batched inserts.
+        metadata (List[dict]): Optional extra payload fields per chunk.
+
+    Returns:
+        List[str]: Ids of the inserted points.
+    """
     points = []
+    date_added = time.time()
     for i, (chunk, emb) in enumerate(zip(chunks, embeddings)):
+        payload = {
+            "text": chunk,
+            "doc_id": doc_id,
+            "chunk_idx": start_idx + i,
+            "date_added": date_added,
+            "chunk_hash": chunk_hash(chunk),
+        }
+        if metadata:
+            payload.update(metadata[i])
         points.append(
             PointStruct(
                 id=str(uuid.uuid4()),
-                vector=emb,
-                payload={"text": chunk, "doc_id": doc_id, "chunk_idx": i, "date_added": str(uuid.uuid1().time)},
+                vector=emb.tolist() if hasattr(emb, "tolist") else emb,
+                payload=payload,
             )
         )
 
     try:
         client.upsert(collection_name=COLLECTION_NAME, points=points)
-    except ValueError as exc:
-        if f"Collection {COLLECTION_NAME} not found" in str(exc):
-            init_collection()
+    except (ValueError, UnexpectedResponse) as exc:
+        if _is_missing_collection(exc):
+            _create_missing_collection()
             client.upsert(collection_name=COLLECTION_NAME, points=points)
         else:
             raise
+    lexical_index.add([(p.id, doc_id, date_added, p.payload["text"]) for p in points])
+    catalog.add_chunks(doc_id, len(points))
+    _bump_corpus_version()
+    return [p.id for p in points]
 
-def search_vectors(query_embedding, limit=3, doc_id=None):
-    try:
-        # If doc_id is provided, filter results to only that document
-        filter_condition = None
-        if doc_id:
-            filter_condition = Filter(
-                must=[
-                    FieldCondition(
-                        key="doc_id",
-                        match=MatchValue(value=doc_id)
-                    )
-                ]
-            )
-
-        results = client.search(
+def _query_points(query_embedding, limit, filter_condition):
+    # Newer qdrant-client releases replace search() with query_points()
+    if not hasattr(client, "search"):
+        return client.query_points(
             collection_name=COLLECTION_NAME,
-            query_vector=query_embedding,
+            query=np.asarray(query_embedding, dtype=np.float32).tolist(),
             limit=limit,
-            query_filter=filter_condition
-        )
-    except ValueError as exc:
-        if f"Collection {COLLECTION_NAME} not found" in str(exc):
-            init_collection()
+            query_filter=filter_condition,
+            search_params=_search_params(),
+            with_payload=True,
+        ).points
+    return client.search(
+        collection_name=COLLECTION_NAME,
+        query_vector=query_embedding,
+        limit=limit,
+        query_filter=filter_condition,
+        search_params=_search_params()
+    )
+
+def _search_points(query_embedding, limit, filter_condition):
+    try:
+        return _query_points(query_embedding, limit, filter_condition)
+    except (ValueError, UnexpectedResponse) as exc:
+        if _is_missing_collection(exc):
+            _create_missing_collection()
             try:
-                results = client.search(
-                    collection_name=COLLECTION_NAME,
-                    query_vector=query_embedding,
-                    limit=limit,
-                    query_filter=filter_condition
-                )
+                return _query_points(query_embedding, limit, filter_condition)
             except Exception:
                 return []
         else:
             raise
 
+def search_vectors(query_embedding, limit=3, doc_id=None, doc_ids=None, date_from=None, date_to=None):
+    # Restrict results to the given documents and date range, if any
+    filter_condition = build_filter(doc_id, doc_ids, date_from, date_to)
+    results = _search_points(query_embedding, limit, filter_condition)
     return [r.payload for r in results]
 
-def list_documents():
+# Hybrid retrieval: candidates taken from each of the vector and lexical
+# searches, and the reciprocal rank fusion constant
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() in ("1", "true", "yes")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", 20))
+RRF_K = int(os.getenv("RRF_K", 60))
+
+_hybrid_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid")
+_hybrid_stats = {"searches": 0, "vector_ms": 0.0, "total_ms": 0.0}
+_hybrid_stats_lock = threading.Lock()
+
+def hybrid_search(query_text, query_embedding, limit=3, doc_id=None, doc_ids=None, date_from=None, date_to=None):
+    """
+    Search with both the vector collection and the BM25 lexical index in
+    parallel, and fuse the two rankings with reciprocal rank fusion.
+
+    Returns:
+        List[dict]: Payloads of the top chunks, best first.
+    """
+    start = time.perf_counter()
+    ids = list(doc_ids or []) + ([doc_id] if doc_id else [])
+    filter_condition = build_filter(doc_id, doc_ids, date_from, date_to)
+    candidates = max(HYBRID_CANDIDATES, limit)
+
+    def timed_vector_search():
+        vector_start = time.perf_counter()
+        results = _search_points(query_embedding, candidates, filter_condition)
+        return results, (time.perf_counter() - vector_start) * 1000
+
+    vector_future = _hybrid_pool.submit(timed_vector_search)
+    lexical_future = _hybrid_pool.submit(lexical_index.search, query_text, candidates, ids, date_from, date_to)
+    vector_results, vector_ms = vector_future.result()
+    lexical_results = lexical_future.result()
+
+    fused = {}
+    payloads = {}
+    for rank, point in enumerate(vector_results):
+        point_id = str(point.id)
+        fused[point_id] = fused.get(point_id, 0.0) + 1 / (RRF_K + rank + 1)
+        payloads[point_id] = point.payload
+    for rank, (point_id, _) in enumerate(lexical_results):
+        fused[point_id] = fused.get(point_id, 0.0) + 1 / (RRF_K + rank + 1)
+
+    top = sorted(fused, key=fused.get, reverse=True)[:limit]
+    missing = [point_id for point_id in top if point_id not in payloads]
+    if missing:
+        for record in client.retrieve(collection_name=COLLECTION_NAME, ids=missing, with_payload=True):
+            payloads[str(record.id)] = record.payload
+
+    with _hybrid_stats_lock:
+        _hybrid_stats["searches"] += 1
+        _hybrid_stats["vector_ms"] += vector_ms
+        _hybrid_stats["total_ms"] += (time.perf_counter() - start) * 1000
+    return [payloads[point_id] for point_id in top if point_id in payloads]
+
+def hybrid_search_stats():
+    """
+    Lexical index size and the average latency hybrid search adds on top of
+    the vector search alone.
+    """
+    with _hybrid_stats_lock:
+        searches = _hybrid_stats["searches"]
+        stats = {
+            "enabled": HYBRID_SEARCH,
+            "searches": searches,
+            "avg_vector_ms": round(_hybrid_stats["vector_ms"] / searches, 3) if searches else None,
+            "avg_total_ms": round(_hybrid_stats["total_ms"] / searches, 3) if searches else None,
+        }
+    if searches:
+        stats["avg_added_ms"] = round(stats["avg_total_ms"] - stats["avg_vector_ms"], 3)
+    stats["lexical_index"] = lexical_index.stats()
+    return stats
+
+def _scroll_document(doc_id, with_payload=True, with_vectors=False):
+    offset = None
     try:
-        results = client.scroll(
-            collection_name=COLLECTION_NAME,
-            limit=100,
-            with_payload=True,
-            with_vectors=False
-        )
-        
-        # Extract unique document IDs and metadata
-        doc_ids = {}
-        for point, _ in results[0]:
-            payload = point.payload
-            doc_id = payload.get("doc_id")
-            if doc_id and doc_id not in doc_ids:
-                doc_ids[doc_id] = {
-                    "doc_id": doc_id,
-                    "chunks": 1
-                }
-            elif doc_id:
-                doc_ids[doc_id]["chunks"] = doc_ids[doc_id]["chunks"] + 1
-                
-        return list(doc_ids.values())
-        
-    except ValueError as exc:
-        if f"Collection {COLLECTION_NAME} not found" in str(exc):
-            init_collection()
-            return []
-        else:
-            raise
-            
+        while True:
+            batch, offset = client.scroll(
+                collection_name=COLLECTION_NAME,
+                scroll_filter=build_filter(doc_id=doc_id),
+                limit=1000,
+                offset=offset,
+                with_payload=with_payload,
+                with_vectors=with_vectors
+            )
+            yield from batch
+            if offset is None:
+                break
+    except (ValueError, UnexpectedResponse) as exc:
+        if _is_missing_collection(exc):
+            return
+        raise
+
+def get_document_points(doc_id):
+    """
+    Return the ids and payloads of all chunk points of a document.
+
+    Returns:
+        List[Tuple[str, dict]]: (point_id, payload) pairs.
+    """
+    return [(point.id, point.payload) for point in _scroll_document(doc_id)]
+
+def get_document_vectors(doc_id):
+    """
+    Return the point ids and vectors of a document's chunks in chunk order.
+
+    Returns:
+        Tuple[List[str], np.ndarray]: Point ids and an (n, dim) array.
+    """
+    points = sorted(
+        _scroll_document(doc_id, with_payload=["chunk_idx"], with_vectors=True),
+        key=lambda point: point.payload.get("chunk_idx", 0),
+    )
+    vectors = np.array([point.vector for point in points], dtype=np.float32).reshape(len(points), -1)
+    return [point.id for point in points], vectors
+
+# Context expansion at query time: "none", "adjacent" (previous and next
+# chunk), "neighbors" (semantically linked chunks) or "both"
+CONTEXT_EXPANSION = os.getenv("CONTEXT_EXPANSION", "none").lower()
+
+def expand_context(results, mode=None, max_extra=None):
+    """
+    Add chunks linked to the retrieved ones, using the adjacent_ids and
+    neighbor_ids stored at ingest time. Linked chunks are fetched by id, so
+    no further vector search is needed.
+
+    Args:
+        results (List[dict]): Retrieved payloads, best first.
+        mode (str): Which links to follow; defaults to CONTEXT_EXPANSION.
+        max_extra (int): Maximum number of chunks to add.
+
+    Returns:
+        List[dict]: The retrieved payloads followed by the linked chunks.
+    """
+    mode = mode or CONTEXT_EXPANSION
+    if mode == "none" or not results:
+        return results
+    fields = {"adjacent": ["adjacent_ids"], "neighbors": ["neighbor_ids"]}.get(mode, ["adjacent_ids", "neighbor_ids"])
+
+    seen = {(r.get("doc_id"), r.get("chunk_idx")) for r in results}
+    linked = []
+    for result in results:
+        for field in fields:
+            for point_id in result.get(field) or []:
+                if point_id not in linked:
+                    linked.append(point_id)
+    if max_extra is not None:
+        linked = linked[:max_extra]
+    if not linked:
+        return results
+
+    records = {str(r.id): r.payload for r in client.retrieve(collection_name=COLLECTION_NAME, ids=linked, with_payload=True)}
+    extra = []
+    for point_id in linked:
+        payload = records.get(str(point_id))
+        if payload is None:
+            continue
+        key = (payload.get("doc_id"), payload.get("chunk_idx"))
+        if key not in seen:
+            seen.add(key)
+            extra.append(payload)
+    return results + extra
+
+def update_payloads(updates):
+    """
+    Overwrite payload fields of existing points without touching vectors.
+
+    Args:
+        updates (List[Tuple[str, dict]]): (point_id, fields) pairs.
+    """
+    if not updates:
+        return
+    client.batch_update_points(
+        collection_name=COLLECTION_NAME,
+        update_operations=[
+            SetPayloadOperation(set_payload=SetPayload(payload=fields, points=[point_id]))
+            for point_id, fields in updates
+        ],
+    )
+    _bump_corpus_version()
+
+def delete_points(doc_id, point_ids):
+    """
+    Delete specific chunk points of a document.
+    """
+    if not point_ids:
+        return
+    client.delete(collection_name=COLLECTION_NAME, points_selector=PointIdsList(points=list(point_ids)))
+    lexical_index.remove_points(point_ids)
+    catalog.add_chunks(doc_id, -len(point_ids))
+    _bump_corpus_version()
+
+def list_documents(offset=0, limit=100):
+    """
+    List documents from the catalog, most recently ingested first.
+    """
+    return catalog.list(offset=offset, limit=limit)
+
+def _scroll_all(payload_fields):
+    """
+    Yield every point of the collection with the given payload fields.
+    """
+    offset = None
+    try:
+        while True:
+            points, offset = client.scroll(
+                collection_name=COLLECTION_NAME,
+                limit=1000,
+                offset=offset,
+                with_payload=payload_fields,
+                with_vectors=False
+            )
+            yield from points
+            if offset is None:
+                break
+    except (ValueError, UnexpectedResponse) as exc:
+        if _is_missing_collection(exc):
+            return
+        raise
+
+def rebuild_catalog():
+    """
+    Populate an empty catalog from the chunk points already stored, for
+    collections created before the catalog existed. Scrolls the whole
+    collection once.
+    """
+    if catalog.count() > 0:
+        return 0
+
+    counts = {}
+    for point in _scroll_all(["doc_id"]):
+        doc_id = point.payload.get("doc_id")
+        if doc_id:
+            counts[doc_id] = counts.get(doc_id, 0) + 1
+
+    for doc_id, chunks in counts.items():
+        catalog.add_chunks(doc_id, chunks)
+    if counts:
+        logger.info(f"Rebuilt document catalog with {len(counts)} documents")
+    return len(counts)
+
+def rebuild_lexical_index():
+    """
+    Populate an empty lexical index from the chunk points already stored.
+    """
+    if not lexical_index.is_empty():
+        return 0
+
+    count = 0
+    batch = []
+    for point in _scroll_all(["doc_id", "date_added", "text"]):
+        date_added = point.payload.get("date_added")
+        batch.append((
+            point.id,
+            point.payload.get("doc_id"),
+            date_added if isinstance(date_added, (int, float)) else None,
+            point.payload.get("text", ""),
+        ))
+        if len(batch) >= 1000:
+            lexical_index.add(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        lexical_index.add(batch)
+        count += len(batch)
+    if count:
+        logger.info(f"Rebuilt lexical index with {count} chunks")
+    return count
+
 def delete_document(doc_id):
     try:
         client.delete(
             collection_name=COLLECTION_NAME,
             points_selector=FilterSelector(
-                filter=Filter(
-                    must=[
-                        FieldCondition(
-                            key="doc_id",
-                            match=MatchValue(value=doc_id)
-                        )
-                    ]
-                )
+                filter=build_filter(doc_id=doc_id)
             )
         )
+        lexical_index.remove_document(doc_id)
+        catalog.remove(doc_id)
+        _bump_corpus_version()
         return True
-    except ValueError as exc:
-        if f"Collection {COLLECTION_NAME} not found" in str(exc):
+    except (ValueError, UnexpectedResponse) as exc:
+        if _is_missing_collection(exc):
             return False
         else:
             raise
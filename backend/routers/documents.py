@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Response, status
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 from core.vector_store import list_documents, delete_document
+from core.catalog import catalog
+from core.jobs import find_active_job
 
 router = APIRouter(
     tags=["documents"],
@@ -11,16 +13,27 @@ router = APIRouter(
 class DocumentInfo(BaseModel):
     doc_id: str
     chunks: int
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    byte_size: Optional[int] = None
+    ingested_at: Optional[float] = None
+    content_hash: Optional[str] = None
 
 
 @router.get("", response_model=List[DocumentInfo])
-async def get_all_documents():
+async def get_all_documents(
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+):
     """
-    List all documents stored in the vector database.
-    Returns a list of document IDs and the number of chunks per document.
+    List documents from the document catalog, most recent first.
+    Returns document metadata and the number of chunks per document.
+    The total number of documents is sent in the X-Total-Count header.
     """
     try:
-        documents = list_documents()
+        documents = list_documents(offset=offset, limit=limit)
+        response.headers["X-Total-Count"] = str(catalog.count())
         return documents
     except Exception as e:
         raise HTTPException(
@@ -34,6 +47,13 @@ async def remove_document(doc_id: str):
     """
     Delete a document from the vector database by its ID.
     """
+    # A running job would keep upserting chunks after the delete
+    active = find_active_job(doc_id)
+    if active is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Document {doc_id} is still being processed by job {active.job_id}"
+        )
     try:
         success = delete_document(doc_id)
         if success:
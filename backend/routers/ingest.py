@@ -1,37 +1,339 @@
-from fastapi import APIRouter, File, UploadFile, Form
-from core.extractor import extract_text
-from core.chunker import chunk_text_with_embeddings, cluster_chunks
-from core.vector_store import insert_vectors
-import os, uuid
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from typing import List
+from core.jobs import submit_job, get_job, find_active_job
+from core.pipeline import ingest_document, ingest_many, update_document
+from core.catalog import catalog
+import os, uuid, zipfile, shutil, mimetypes, hashlib
 
 router = APIRouter()
 
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-@router.post("")
-async def upload_document(file: UploadFile = File(...)):
-    file_id = str(uuid.uuid4())
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
+UPLOAD_READ_SIZE = 1024 * 1024
+
+# Limits on zip archives in bulk uploads: member files, uncompressed size of
+# one member, and uncompressed size of all extracted members
+ZIP_MAX_MEMBERS = int(os.getenv("ZIP_MAX_MEMBERS", 1000))
+ZIP_MAX_MEMBER_BYTES = int(os.getenv("ZIP_MAX_MEMBER_BYTES", 100 * 1024 * 1024))
+ZIP_MAX_TOTAL_BYTES = int(os.getenv("ZIP_MAX_TOTAL_BYTES", 1024 * 1024 * 1024))
+
+async def _save_upload(file, file_path):
+    """
+    Write an upload to disk, hashing it as it is received.
+
+    Returns:
+        Tuple[str, int]: SHA-256 hex digest and size in bytes.
+    """
+    digest = hashlib.sha256()
+    size = 0
     with open(file_path, "wb") as f:
-        f.write(await file.read())
+        while True:
+            data = await file.read(UPLOAD_READ_SIZE)
+            if not data:
+                break
+            digest.update(data)
+            size += len(data)
+            f.write(data)
+    return digest.hexdigest(), size
 
-    text = extract_text(file_path, file.content_type)
-    chunks_with_embeddings = chunk_text_with_embeddings(text)
-    chunks = [chunk["text"] for chunk in chunks_with_embeddings]
-    embeddings = [chunk["embedding"] for chunk in chunks_with_embeddings]
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def upload_document(file: UploadFile = File(...), force: bool = Form(False)):
+    """
+    Store the upload and queue it for background ingestion.
+    Poll GET /api/ingest/{job_id} for progress.
 
-    # Cluster the chunks
-    cluster_indices = cluster_chunks(chunks_with_embeddings)
+    If identical content was already ingested, the existing doc_id is
+    returned without processing the file again, unless force is set.
+    """
+    content_type = _check_content_type(file)
+    file_id = str(uuid.uuid4())
+    # Prefix with the doc id so uploads with the same name don't overwrite each other
+    file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{os.path.basename(file.filename)}")
+    content_hash, byte_size = await _save_upload(file, file_path)
 
-    # Store the clusters and embeddings
-    insert_vectors(chunks, embeddings, file_id)
+    existing = None if force else catalog.find_by_hash(content_hash)
+    if existing is not None:
+        os.remove(file_path)
+        return JSONResponse(status_code=status.HTTP_200_OK, content={
+            "message": "Identical file already ingested",
+            "job_id": None,
+            "doc_id": existing["doc_id"],
+            "filename": file.filename,
+            "status": "duplicate",
+            "chunks": existing["chunks"],
+            "content_type": content_type,
+            "content_hash": content_hash,
+        })
+
+    # Record the hash before the job runs so concurrent re-uploads match it
+    catalog.register(
+        file_id,
+        filename=file.filename,
+        content_type=content_type,
+        byte_size=byte_size,
+        content_hash=content_hash,
+    )
+
+    job = submit_job(
+        "ingest",
+        ingest_document,
+        file_path,
+        content_type,
+        file_id,
+        file.filename,
+        metadata={"doc_id": file_id, "filename": file.filename},
+        cleanup=[file_path],
+    )
 
     return {
-        "message": "File processed successfully", 
+        "message": "File queued for processing",
+        "job_id": job.job_id,
         "doc_id": file_id,
         "filename": file.filename,
-        "chunks": len(chunks),
-        "clusters": cluster_indices.tolist(),
-        "content_type": file.content_type
+        "status": job.status,
+        "content_type": content_type,
+        "content_hash": content_hash
+    }
+
+SUPPORTED_TYPES = {"application/pdf", "text/plain"}
+ZIP_TYPES = {"application/zip", "application/x-zip-compressed"}
+
+def _content_type(filename, declared=None):
+    if declared in SUPPORTED_TYPES or declared in ZIP_TYPES:
+        return declared
+    guessed, _ = mimetypes.guess_type(filename)
+    return guessed or declared
+
+def _check_content_type(file):
+    """
+    Resolve the upload's content type, rejecting unsupported files before
+    anything is stored or queued.
+    """
+    content_type = _content_type(file.filename, file.content_type)
+    if content_type not in SUPPORTED_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported file type {content_type or 'unknown'}; supported: {', '.join(sorted(SUPPORTED_TYPES))}"
+        )
+    return content_type
+
+def _expand_zip(zip_path, target_dir):
+    """
+    Extract supported files from a zip archive into target_dir.
+
+    Members beyond ZIP_MAX_MEMBERS, larger than ZIP_MAX_MEMBER_BYTES, or
+    that would take the archive past ZIP_MAX_TOTAL_BYTES uncompressed are
+    not extracted.
+
+    Returns:
+        List[Tuple[str, str, str, str]]: (file_path, filename, content_type,
+        error) for each member. file_path is None for members that were not
+        extracted: content_type is None for unsupported members, and error
+        says why a member was rejected.
+    """
+    members = []
+    total_bytes = 0
+    with zipfile.ZipFile(zip_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            # Flatten paths so members can't escape target_dir
+            filename = os.path.basename(info.filename)
+            if not filename or filename.startswith("."):
+                continue
+            if len(members) >= ZIP_MAX_MEMBERS:
+                members.append((None, info.filename, None, f"Archive has more than {ZIP_MAX_MEMBERS} files"))
+                continue
+            content_type = _content_type(filename)
+            if content_type not in SUPPORTED_TYPES:
+                members.append((None, info.filename, None, None))
+                continue
+            # file_size comes from the archive, but reads stop there, so a
+            # member can't decompress to more than it declares
+            if info.file_size > ZIP_MAX_MEMBER_BYTES:
+                members.append((None, info.filename, content_type, f"File exceeds {ZIP_MAX_MEMBER_BYTES} bytes"))
+                continue
+            if total_bytes + info.file_size > ZIP_MAX_TOTAL_BYTES:
+                members.append((None, info.filename, content_type, f"Archive exceeds {ZIP_MAX_TOTAL_BYTES} bytes uncompressed"))
+                continue
+            total_bytes += info.file_size
+            file_path = os.path.join(target_dir, f"{len(members)}_{filename}")
+            with archive.open(info) as src, open(file_path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            members.append((file_path, info.filename, content_type, None))
+    return members
+
+def _hash_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for data in iter(lambda: f.read(UPLOAD_READ_SIZE), b""):
+            digest.update(data)
+    return digest.hexdigest()
+
+@router.post("/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def upload_documents_bulk(files: List[UploadFile] = File(...), force: bool = Form(False)):
+    """
+    Store many files and/or zip archives and ingest them as one job.
+
+    Embedding batches span document boundaries. The job result holds a
+    per-file manifest; poll GET /api/ingest/{job_id} for it. Files whose
+    content was already ingested are reported as duplicates unless force
+    is set.
+    """
+    bulk_id = str(uuid.uuid4())
+    bulk_dir = os.path.join(UPLOAD_DIR, bulk_id)
+    os.makedirs(bulk_dir, exist_ok=True)
+
+    entries = []
+    skipped = []
+    # Hashes within this request, so duplicates inside one archive are caught
+    seen = {}
+    for index, file in enumerate(files):
+        file_path = os.path.join(bulk_dir, f"{index}_{os.path.basename(file.filename)}")
+        upload_hash, _ = await _save_upload(file, file_path)
+
+        content_type = _content_type(file.filename, file.content_type)
+        if content_type in ZIP_TYPES:
+            # Each archive gets its own directory, so members with the same
+            # name in different archives don't overwrite each other
+            archive_dir = os.path.join(bulk_dir, str(index))
+            os.makedirs(archive_dir, exist_ok=True)
+            try:
+                members = await run_in_threadpool(_expand_zip, file_path, archive_dir)
+            except zipfile.BadZipFile:
+                skipped.append({"filename": file.filename, "status": "failed", "error": "Invalid zip archive"})
+                continue
+            finally:
+                os.remove(file_path)
+        else:
+            members = [(file_path, file.filename, content_type if content_type in SUPPORTED_TYPES else None, None)]
+
+        for member_path, filename, member_type, error in members:
+            if error is not None:
+                skipped.append({"filename": filename, "status": "rejected", "error": error})
+                continue
+            if member_type is None:
+                skipped.append({"filename": filename, "status": "skipped", "error": "Unsupported file type"})
+                continue
+            if member_path == file_path:
+                content_hash = upload_hash
+            else:
+                content_hash = await run_in_threadpool(_hash_file, member_path)
+            existing = None if force else (catalog.find_by_hash(content_hash) or seen.get(content_hash))
+            if existing is not None:
+                os.remove(member_path)
+                skipped.append({"filename": filename, "status": "duplicate", "doc_id": existing["doc_id"]})
+                continue
+            doc_id = str(uuid.uuid4())
+            catalog.register(
+                doc_id,
+                filename=filename,
+                content_type=member_type,
+                byte_size=os.path.getsize(member_path),
+                content_hash=content_hash,
+            )
+            seen[content_hash] = {"doc_id": doc_id}
+            entries.append({
+                "file_path": member_path,
+                "content_type": member_type,
+                "doc_id": doc_id,
+                "filename": filename,
+            })
+
+    if not entries:
+        shutil.rmtree(bulk_dir, ignore_errors=True)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "No supported files to ingest", "files": skipped}
+        )
+
+    job = submit_job(
+        "bulk_ingest",
+        ingest_many,
+        entries,
+        metadata={"files": len(entries), "doc_ids": [e["doc_id"] for e in entries], "skipped": skipped},
+        cleanup=[bulk_dir],
+    )
+
+    return {
+        "message": f"{len(entries)} files queued for processing",
+        "job_id": job.job_id,
+        "status": job.status,
+        "files": [{"filename": e["filename"], "doc_id": e["doc_id"]} for e in entries],
+        "skipped": skipped,
+    }
+
+@router.post("/{doc_id}/update", status_code=status.HTTP_202_ACCEPTED)
+async def update_existing_document(doc_id: str, file: UploadFile = File(...)):
+    """
+    Replace an existing document with a new version, re-embedding only the
+    chunks whose content changed. Poll GET /api/ingest/{job_id} for progress.
+    """
+    document = catalog.get(doc_id)
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document {doc_id} not found"
+        )
+
+    content_type = _check_content_type(file)
+    file_path = os.path.join(UPLOAD_DIR, f"{doc_id}_{uuid.uuid4().hex[:8]}_{os.path.basename(file.filename)}")
+    content_hash, _ = await _save_upload(file, file_path)
+
+    if content_hash == document.get("content_hash"):
+        os.remove(file_path)
+        return JSONResponse(status_code=status.HTTP_200_OK, content={
+            "message": "Document content unchanged",
+            "job_id": None,
+            "doc_id": doc_id,
+            "status": "unchanged",
+            "chunks": document["chunks"],
+        })
+
+    # Checked after the upload is saved, with no await before submit_job,
+    # so two updates can't both pass
+    active = find_active_job(doc_id)
+    if active is not None:
+        os.remove(file_path)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Document {doc_id} is still being processed by job {active.job_id}"
+        )
+
+    job = submit_job(
+        "update",
+        update_document,
+        file_path,
+        content_type,
+        doc_id,
+        file.filename,
+        content_hash=content_hash,
+        metadata={"doc_id": doc_id, "filename": file.filename},
+        cleanup=[file_path],
+    )
+
+    return {
+        "message": "Document update queued for processing",
+        "job_id": job.job_id,
+        "doc_id": doc_id,
+        "filename": file.filename,
+        "status": job.status,
+        "content_type": content_type,
+        "content_hash": content_hash
     }
+
+@router.get("/{job_id}")
+async def get_ingest_status(job_id: str):
+    """
+    Report status, per-stage progress and timings of an ingestion job.
+    """
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found"
+        )
+    return job.to_dict()
@@ -1,44 +1,189 @@
 import os
+import json
+import logging
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
 from core.embedder import generate_combined_embedding
-from core.vector_store import search_vectors
-from core.llm import ask_llm
-from fastapi.responses import JSONResponse
+from core.vector_store import search_vectors, hybrid_search, expand_context, get_corpus_version, HYBRID_SEARCH
+from core.llm import ask_llm_async, stream_llm
+from core.llm_client import LLM_BACKEND
+from core.answer_cache import answer_cache
+from core.reranker import rerank, RERANK_ENABLED, RERANK_CANDIDATES
+from core.context import select_contexts
+from core.metrics import SEARCH_SECONDS
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 class QueryRequest(BaseModel):
     query: str
     doc_id: Optional[str] = None
+    doc_ids: Optional[List[str]] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+def _scope(req):
+    """
+    Cache key component for the documents and dates a query is limited to.
+    """
+    if not req.doc_ids and req.date_from is None and req.date_to is None:
+        return req.doc_id
+    return (
+        req.doc_id,
+        tuple(sorted(req.doc_ids or [])),
+        req.date_from.timestamp() if req.date_from else None,
+        req.date_to.timestamp() if req.date_to else None,
+    )
+
+def _search(req, query_embedding):
+    with SEARCH_SECONDS.time():
+        return _retrieve(req, query_embedding)
+
+def _retrieve(req, query_embedding):
+    # With reranking on, retrieve a wider pool and let the cross-encoder pick
+    limit = RERANK_CANDIDATES if RERANK_ENABLED else 3
+    scope = dict(
+        doc_id=req.doc_id,
+        doc_ids=req.doc_ids,
+        date_from=req.date_from.timestamp() if req.date_from else None,
+        date_to=req.date_to.timestamp() if req.date_to else None,
+    )
+    if HYBRID_SEARCH:
+        results = hybrid_search(req.query, query_embedding, limit=limit, **scope)
+    else:
+        results = search_vectors(query_embedding, limit=limit, **scope)
+    if RERANK_ENABLED:
+        results = rerank(req.query, results)
+    # Pull in adjacent or semantically linked chunks stored at ingest time
+    results = expand_context(results)
+    # Keep the chunks that fit the prompt budget, so the returned sources
+    # match the Doc numbers the LLM cites
+    return select_contexts(results)
+
+def _require_api_key():
+    # The offline fake backend needs no key
+    if LLM_BACKEND == "gemini" and not os.getenv("GEMINI_API_KEY"):
+        raise HTTPException(
+            status_code=500,
+            detail="GEMINI_API_KEY environment variable is not set."
+        )
+
+def _no_results_message(req):
+    doc_ids = ([req.doc_id] if req.doc_id else []) + (req.doc_ids or [])
+    if doc_ids:
+        return f"No relevant content found for your query in document {', '.join(doc_ids)}."
+    return "No relevant documents found for your query."
 
 @router.post("")
 async def query_docs(req: QueryRequest):
     try:
-        print(f"Received query request: query='{req.query}', doc_id={req.doc_id}")
+        logger.info(f"Received query request: query='{req.query}', doc_id={req.doc_id}")
         
-        if not os.getenv("GEMINI_API_KEY"):
-            raise HTTPException(
-                status_code=500,
-                detail="GEMINI_API_KEY environment variable is not set."
-            )
+        _require_api_key()
+
+        version = get_corpus_version()
+        scope = _scope(req)
+        cached = answer_cache.get(req.query, scope, version)
+        if cached is not None:
+            return JSONResponse(content={**cached, "cached": True, "cache_match": "exact"}, status_code=200)
             
-        query_embedding = generate_combined_embedding(req.query)
+        # Embedding and search are CPU/disk bound; keep them off the event loop
+        query_embedding = await run_in_threadpool(generate_combined_embedding, req.query)
+
+        cached = answer_cache.get_similar(query_embedding, scope, version)
+        if cached is not None:
+            return JSONResponse(content={**cached, "cached": True, "cache_match": "semantic"}, status_code=200)
+        answer_cache.record_miss()
         
-        # Search vectors (clusters can be used here if stored in the vector database)
-        results = search_vectors(query_embedding, doc_id=req.doc_id)
+        # Search vectors, fused with lexical matches when hybrid search is on
+        results = await run_in_threadpool(_search, req, query_embedding)
         
         if not results:
-            message = "No relevant documents found for your query."
-            if req.doc_id:
-                message = f"No relevant content found for your query in document {req.doc_id}."
-            return JSONResponse(content={"answer": message, "sources": []}, status_code=200)
+            message = _no_results_message(req)
+            return JSONResponse(content={"answer": message, "sources": [], "cached": False}, status_code=200)
         
-        answer = ask_llm(req.query, results)
-        return JSONResponse(content={"answer": answer, "sources": results}, status_code=200)
+        answer = await ask_llm_async(req.query, results)
+        # Don't cache provider failures, which ask_llm reports as answer text
+        if not answer.startswith(("Error:", "Sorry, I couldn't process your request")):
+            answer_cache.put(req.query, scope, version, {"answer": answer, "sources": results}, query_embedding)
+        return JSONResponse(content={"answer": answer, "sources": results, "cached": False}, status_code=200)
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"Error processing query: {e}")
+        logger.exception(f"Error processing query: {e}")
+        return JSONResponse(content={"detail": "Internal Server Error", "error": str(e)}, status_code=500)
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/stream")
+async def query_docs_stream(req: QueryRequest):
+    """
+    Answer a query as Server-Sent Events.
+
+    Emits a "sources" event with the retrieved chunks as soon as retrieval
+    finishes, then one "token" event per answer fragment, then "done".
+    """
+    logger.info(f"Received streaming query request: query='{req.query}', doc_id={req.doc_id}")
+
+    _require_api_key()
+
+    version = get_corpus_version()
+    scope = _scope(req)
+    try:
+        cached = answer_cache.get(req.query, scope, version)
+        query_embedding = None
+        if cached is None:
+            query_embedding = await run_in_threadpool(generate_combined_embedding, req.query)
+            cached = answer_cache.get_similar(query_embedding, scope, version)
+        if cached is None:
+            answer_cache.record_miss()
+            results = await run_in_threadpool(_search, req, query_embedding)
+        else:
+            results = cached["sources"]
+    except Exception as e:
+        # Nothing has been streamed yet, so fail the same way query_docs does
+        logger.exception(f"Error retrieving context for streaming query: {e}")
         return JSONResponse(content={"detail": "Internal Server Error", "error": str(e)}, status_code=500)
+
+    async def events():
+        yield _sse("sources", {"sources": results, "cached": cached is not None})
+
+        if cached is not None:
+            yield _sse("token", {"text": cached["answer"]})
+            yield _sse("done", {"cached": True})
+            return
+
+        if not results:
+            yield _sse("token", {"text": _no_results_message(req)})
+            yield _sse("done", {"cached": False})
+            return
+
+        parts = []
+        try:
+            async for text in stream_llm(req.query, results):
+                parts.append(text)
+                yield _sse("token", {"text": text})
+        except Exception as e:
+            logger.exception(f"Error streaming answer: {e}")
+            yield _sse("error", {"detail": "Internal Server Error", "error": str(e)})
+            return
+
+        answer = "".join(parts)
+        if not answer.startswith(("Error:", "Sorry, I couldn't process your request")):
+            answer_cache.put(req.query, scope, version, {"answer": answer, "sources": results}, query_embedding)
+        yield _sse("done", {"cached": False})
+
+    # The provider stream is awaited through the async LLM client, so it
+    # never stalls the event loop
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
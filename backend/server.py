@@ -0,0 +1,127 @@
+import os
+import threading
+from fastapi import FastAPI, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from routers import ingest, query, documents
+from fastapi.middleware.cors import CORSMiddleware
+from core.auth import verify_token, get_optional_token
+from core.registry import registry, WARMUP_MODELS
+from core.metrics import metrics, CallbackCounter, RequestMetricsMiddleware
+
+app = FastAPI(title="DocChat Backend", redirect_slashes=False)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+app.add_middleware(RequestMetricsMiddleware)
+
+# AUTH DEBUG MODE: Authentication is completely bypassed for debugging
+# Every request will receive a fake authenticated user
+print("🛑 WARNING: Running in AUTH BYPASS MODE. All requests will be authenticated!")
+print("🔐 A debug user will be used for all requests")
+
+# Add all routers WITHOUT authentication dependencies for debugging
+app.include_router(ingest.router, prefix="/api/ingest")
+app.include_router(query.router, prefix="/api/query")
+app.include_router(documents.router, prefix="/api/documents")
+
+@app.on_event("startup")
+async def prepare_storage():
+    from core.vector_store import (
+        ensure_payload_indexes, ensure_quantization, check_vector_size, rebuild_catalog, rebuild_lexical_index,
+    )
+    check_vector_size()
+    ensure_payload_indexes()
+    ensure_quantization()
+    rebuild_catalog()
+    rebuild_lexical_index()
+
+@app.on_event("startup")
+async def warmup_models():
+    # Load models in the background so the server accepts connections
+    # immediately; /api/ready reports when they are available
+    if WARMUP_MODELS:
+        threading.Thread(target=registry.warmup, name="model-warmup", daemon=True).start()
+
+@app.get("/")
+async def root():
+    return {"message": "Welcome to DocChat Backend!"}
+
+@app.get("/api/status")
+async def status():
+    try:
+        from core.vector_store import client, is_local_client
+        from core.embedding_cache import embedding_cache
+        from core.answer_cache import answer_cache
+        from core.embedder import MODEL_ID
+        from core.vector_store import hybrid_search_stats
+        from core.reranker import rerank_stats
+        from core.context import context_stats
+        from core.llm_client import llm_client
+        gemini_key = os.getenv("GEMINI_API_KEY")
+        
+        # Check if we're using in-memory or persistent storage
+        try:
+            if not is_local_client():
+                storage_type = "remote"
+            else:
+                storage_type = "in-memory" if str(client._client.location) == ":memory:" else "persistent"
+        except Exception:
+            storage_type = "unknown"
+        
+        # The lexical index stats query SQLite, so they are read off the
+        # event loop
+        hybrid_search = await run_in_threadpool(hybrid_search_stats)
+
+        return {
+            "status": "operational",
+            "gemini_configured": bool(gemini_key),
+            "vector_db": storage_type,
+            "embedding_cache": embedding_cache.stats(),
+            "answer_cache": answer_cache.stats(),
+            "models": registry.status()["models"],
+            "embedder": MODEL_ID,
+            "hybrid_search": hybrid_search,
+            "reranker": rerank_stats(),
+            "context": context_stats(),
+            "llm": llm_client.stats(),
+            "missing_config": [] if gemini_key else ["GEMINI_API_KEY"]
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "error": str(e)
+        }
+
+def _cache_hits():
+    from core.embedding_cache import embedding_cache
+    from core.answer_cache import answer_cache
+    answers = answer_cache.stats()
+    return [
+        (("embedding",), embedding_cache.stats()["hits"]),
+        (("answer_exact",), answers["hits"] - answers["semantic_hits"]),
+        (("answer_semantic",), answers["semantic_hits"]),
+    ]
+
+metrics.register(CallbackCounter("docchat_cache_hits_total", "Cache hits by cache.", ["cache"], _cache_hits))
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Latencies and counters in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/ready")
+async def ready():
+    """
+    Readiness probe: 200 once all models are loaded, 503 until then.
+    With WARMUP_MODELS=false models load on first use, so this is always 200.
+    """
+    model_status = registry.status()
+    return JSONResponse(content=model_status, status_code=200 if model_status["ready"] else 503)